@@ -0,0 +1,96 @@
+import os
+from datetime import datetime
+
+import arcpy
+
+# Unités ArcPy correspondant aux unités des systèmes de coordonnées usuels
+_UNITES = {"Meter": "Meters", "Foot": "Feet", "Foot_US": "Feet", "Degree": "DecimalDegrees"}
+
+
+def _distance(valeur, reference_spatiale):
+    """
+    Formate une distance exprimée dans les unités du système de coordonnées (ex : '0.005 Meters').
+    """
+    if reference_spatiale.type == "Geographic":
+        unite = _UNITES.get(reference_spatiale.angularUnitName)
+    else:
+        unite = _UNITES.get(reference_spatiale.linearUnitName)
+    return f"{valeur:.12g} {unite}" if unite else f"{valeur:.12g}"
+
+
+def compter_lacunes(couche, geodatabase_temporaire, nom):
+    """
+    Compte les polygones produits par l'effacement de la couche dans sa boîte englobante
+    (étapes 1 à 3 du traitement), polygone extérieur compris.
+    """
+    boite = os.path.join(geodatabase_temporaire, f"{nom}_boite")
+    effacement = os.path.join(geodatabase_temporaire, f"{nom}_effacement")
+    lacunes = os.path.join(geodatabase_temporaire, nom)
+    arcpy.management.MinimumBoundingGeometry(couche, boite, "ENVELOPE", "ALL")
+    arcpy.analysis.PairwiseErase(boite, couche, effacement)
+    arcpy.management.MultipartToSinglepart(effacement, lacunes)
+    nb_lacunes = int(arcpy.management.GetCount(lacunes)[0])
+    for intermediaire in (boite, effacement, lacunes):
+        arcpy.management.Delete(intermediaire)
+    return nb_lacunes
+
+
+def accrocher_couverture(donnees_entree, geodatabase_temporaire, taille_grille=None, tolerance=None,
+                         rapport=False):
+    """
+    Accroche la couverture d'entrée sur une grille de précision fixe et les sommets sur les
+    limites voisines, avant l'extraction des lacunes.
+
+    Les coordonnées sont d'abord arrondies sur la grille (résolution XY de la copie écrite dans
+    la géodatabase temporaire), puis Integrate regroupe les sommets distants de moins de
+    `tolerance` et insère les sommets proches dans les segments voisins : des limites qui
+    devraient coïncider deviennent identiques et les micro-lacunes qui les séparaient disparaissent.
+
+    :param donnees_entree: Chemin des données d'entrée (non modifiées).
+    :param taille_grille: Pas de la grille, dans les unités du système de coordonnées ; par
+                          défaut 1e-9 degré pour un système géographique, 0,1 mm sinon.
+    :param tolerance: Distance d'accrochage, dans les mêmes unités ; par défaut 5e-8 degré
+                      (environ 5 mm) pour un système géographique, 5 mm sinon.
+    :param rapport: Compte aussi les lacunes des données non accrochées (un effacement de plus),
+                    à comparer ensuite au résultat de l'étape 3 avec rapporter_accrochage.
+    :return: Tuple (chemin de la couche accrochée dans la géodatabase temporaire, nombre de
+             lacunes avant accrochage ou None sans rapport).
+    """
+    reference_spatiale = arcpy.Describe(donnees_entree).spatialReference
+    geographique = reference_spatiale.type == "Geographic"
+    if taille_grille is None:
+        taille_grille = 1e-9 if geographique else 1e-4
+    if tolerance is None:
+        tolerance = 5e-8 if geographique else 5e-3
+    if tolerance < taille_grille:
+        raise ValueError("La tolérance d'accrochage doit être au moins égale au pas de la grille.")
+
+    nb_lacunes_avant = None
+    if rapport:
+        nb_lacunes_avant = compter_lacunes(donnees_entree, geodatabase_temporaire, "lacunes_avant_accrochage")
+
+    donnees_accrochees = os.path.join(geodatabase_temporaire, "donnees_accrochees")
+    print(f"[{datetime.now()}] Accrochage sur une grille de {_distance(taille_grille, reference_spatiale)}, "
+          f"tolérance de {_distance(tolerance, reference_spatiale)}")
+
+    # La résolution XY de la copie arrondit toutes les coordonnées sur la grille
+    with arcpy.EnvManager(XYResolution=_distance(taille_grille, reference_spatiale),
+                          XYTolerance=_distance(taille_grille, reference_spatiale)):
+        arcpy.management.CopyFeatures(donnees_entree, donnees_accrochees)
+
+    # Regroupement des sommets proches et insertion des sommets sur les segments voisins
+    arcpy.management.Integrate(donnees_accrochees, _distance(tolerance, reference_spatiale))
+
+    return donnees_accrochees, nb_lacunes_avant
+
+
+def rapporter_accrochage(nb_lacunes_avant, polygones_simple):
+    """
+    Affiche le nombre de micro-lacunes supprimées par l'accrochage, en comparant le compte fait
+    avant accrochage aux polygones simples de l'étape 3. Ne fait rien sans compte préalable.
+    """
+    if nb_lacunes_avant is None:
+        return
+    apres = int(arcpy.management.GetCount(polygones_simple)[0])
+    print(f"[{datetime.now()}] Micro-lacunes supprimées par l'accrochage : {nb_lacunes_avant - apres} "
+          f"({nb_lacunes_avant} lacunes avant, {apres} après)")
@@ -0,0 +1,191 @@
+import csv
+import os
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+import arcpy
+
+from fonction.ft_accrochage import rapporter_accrochage
+from fonction.ft_etapes import (
+    generer_boite_englobante,
+    supprimer_zones_recouvertes,
+    convertir_en_polygones_simple,
+    extraire_sommets,
+    creer_polygones_thiessen,
+    effectuer_jointure_spatiale,
+    merge_donnees,
+    dissoudre_avec_statistiques,
+    exporter_resultat,
+)
+
+# Champs de travail portés par les lacunes, retirés avant la fusion avec les données d'entrée
+CHAMPS_LACUNES = ["ID_LACUNE", "SUPERFICIE_KM2", "RANG_SEUIL"]
+# Identifiants des entités sources ajoutés par PairwiseIntersect (FID_<classe d'entités>)
+CHAMPS_INTERSECTION = ["FID_polygones_thiessen", "FID_polygones_simple"]
+
+
+def etiqueter_lacunes(polygones_simple, seuils):
+    """
+    Calcule une seule fois la superficie de chaque lacune et l'étiquette avec les seuils sous
+    lesquels elle est comblée.
+
+    Une lacune est comblée pour un seuil s'il est supérieur ou égal à sa superficie (comme dans
+    supprimer_plus_grand_polygone). RANG_SEUIL est le rang du plus petit de ces seuils dans la
+    liste triée : la lacune est comblée pour tous les seuils de rang supérieur ou égal. Les
+    lacunes qui dépassent le plus grand seuil sont supprimées.
+
+    :param polygones_simple: Classe d'entités des lacunes (polygones à une seule partie).
+    :param seuils: Seuils de superficie triés, en kilomètres carrés.
+    :return: Liste de tuples (rang du seuil, superficie en km²) des lacunes conservées.
+    """
+    print(f"[{datetime.now()}] Étiquetage des lacunes pour les seuils {seuils} km²")
+    for champ, type_champ in zip(CHAMPS_LACUNES, ["LONG", "DOUBLE", "SHORT"]):
+        arcpy.management.AddField(polygones_simple, champ, type_champ)
+
+    arcpy.management.CalculateGeometryAttributes(
+        in_features=polygones_simple,
+        geometry_property=[["SUPERFICIE_KM2", "AREA_GEODESIC"]],
+        area_unit="SQUARE_KILOMETERS"
+    )
+
+    lacunes = []
+    supprimees = 0
+    with arcpy.da.UpdateCursor(polygones_simple, ["OID@"] + CHAMPS_LACUNES) as cursor:
+        for row in cursor:
+            rang = bisect_left(seuils, row[2])
+            if rang == len(seuils):
+                cursor.deleteRow()
+                supprimees += 1
+                continue
+            row[1] = row[0]
+            row[3] = rang
+            cursor.updateRow(row)
+            lacunes.append((rang, row[2]))
+
+    print(f"Nombre de polygones supprimés : {supprimees}")
+    return lacunes
+
+
+def decouper_polygones_thiessen_etiquetes(polygones_thiessen, polygones_simple, geodatabase_temporaire):
+    """
+    Découpe les polygones de Thiessen avec les lacunes en conservant leurs étiquettes.
+
+    Contrairement à decouper_polygones_thiessen (Clip), l'intersection reporte sur chaque
+    morceau les champs de la lacune qui le contient.
+    """
+    polygones_thiessen_decoupes = os.path.join(geodatabase_temporaire, "polygones_thiessen_decoupes")
+    print(f"[{datetime.now()}] Étape 7 : Découper les polygones de Thiessen (lacunes étiquetées)")
+    arcpy.analysis.PairwiseIntersect(
+        in_features=[polygones_thiessen, polygones_simple],
+        out_feature_class=polygones_thiessen_decoupes,
+        join_attributes="ALL"
+    )
+    return polygones_thiessen_decoupes
+
+
+def selectionner_morceaux(resultat_jointure_spatiale, rang, geodatabase_temporaire):
+    """
+    Extrait les morceaux des lacunes comblées pour le seuil de rang donné, sans les champs de travail.
+    """
+    morceaux = os.path.join(geodatabase_temporaire, f"jointure_spatiale_seuil_{rang}")
+    arcpy.analysis.Select(
+        in_features=resultat_jointure_spatiale,
+        out_feature_class=morceaux,
+        where_clause=f"RANG_SEUIL <= {rang}"
+    )
+    # Seuls les champs de travail sont retirés : les attributs d'entrée (même nommés FID_*) restent
+    champs_travail = {c.upper() for c in CHAMPS_LACUNES + CHAMPS_INTERSECTION}
+    champs = [f.name for f in arcpy.ListFields(morceaux)]
+    a_supprimer = [c for c in champs if c.upper() in champs_travail]
+    if a_supprimer:
+        arcpy.management.DeleteField(morceaux, a_supprimer)
+    return morceaux
+
+
+def ecrire_comparaison(lignes, chemin_csv):
+    """
+    Écrit le tableau comparatif des seuils au format CSV (séparateur ';').
+    """
+    with open(chemin_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["seuil_km2", "lacunes_comblees", "superficie_reaffectee_km2", "duree_s", "resultat"])
+        writer.writerows(lignes)
+    print(f"[{datetime.now()}] Tableau comparatif écrit : {chemin_csv}")
+    return chemin_csv
+
+
+def balayer_seuils(donnees_entree, geodatabase_temporaire, dossier_sortie, nom_sans_extension, seuils,
+                   nb_lacunes_avant=None):
+    """
+    Exécute le traitement pour plusieurs seuils de superficie en ne calculant qu'une fois les
+    étapes qui n'en dépendent pas.
+
+    Les étapes 1 à 3 (boîte englobante, effacement, polygones simples), puis les sommets, les
+    polygones de Thiessen, leur découpe et la jointure spatiale, sont calculés une seule fois
+    sur les lacunes qualifiées pour le plus grand seuil. Chaque morceau porte le rang du plus
+    petit seuil qui comble sa lacune. Pour chaque seuil, seuls la sélection des morceaux, la
+    fusion et la dissolution sont refaites.
+
+    :param donnees_entree: Chemin des données d'entrée (avec OID_ORIG).
+    :param seuils: Liste des seuils de superficie (en kilomètres carrés).
+    :param nb_lacunes_avant: Nombre de lacunes avant accrochage (voir accrocher_couverture), pour le rapport.
+    :return: Chemin du tableau comparatif (CSV) écrit dans le dossier de sortie.
+    """
+    seuils = sorted(set(float(s) for s in seuils))
+    if not seuils:
+        raise ValueError("Aucun seuil de superficie fourni.")
+    # Écriture décimale fixe : '1e-05' donnerait un nom de classe d'entités invalide
+    suffixes = [f"{seuil:.6f}".rstrip("0").rstrip(".").replace(".", "_") for seuil in seuils]
+    if len(set(suffixes)) < len(suffixes):
+        raise ValueError("Les seuils doivent différer d'au moins 0.000001 km².")
+
+    debut = time.perf_counter()
+    boite_englobante = generer_boite_englobante(donnees_entree, geodatabase_temporaire)
+    boite_englobante_sans_donnees = supprimer_zones_recouvertes(
+        boite_englobante, donnees_entree, geodatabase_temporaire
+    )
+    polygones_simple = convertir_en_polygones_simple(boite_englobante_sans_donnees, geodatabase_temporaire)
+    rapporter_accrochage(nb_lacunes_avant, polygones_simple)
+    lacunes = etiqueter_lacunes(polygones_simple, seuils)
+
+    if lacunes:
+        points_sommet = extraire_sommets(polygones_simple, geodatabase_temporaire)
+        polygones_thiessen = creer_polygones_thiessen(points_sommet, geodatabase_temporaire)
+        polygones_thiessen_decoupes = decouper_polygones_thiessen_etiquetes(
+            polygones_thiessen, polygones_simple, geodatabase_temporaire
+        )
+        resultat_jointure_spatiale = effectuer_jointure_spatiale(
+            polygones_thiessen_decoupes, donnees_entree, geodatabase_temporaire
+        )
+    duree_commune = time.perf_counter() - debut
+    print(f"[{datetime.now()}] Étapes communes terminées en {duree_commune:.1f} s")
+
+    lignes = []
+    for rang, seuil in enumerate(seuils):
+        debut = time.perf_counter()
+        print(f"[{datetime.now()}] Seuil {seuil} km² ({rang + 1}/{len(seuils)})")
+        comblees = [superficie for rang_lacune, superficie in lacunes if rang_lacune <= rang]
+        nom_seuil = f"{nom_sans_extension}_seuil_{suffixes[rang]}"
+
+        if comblees:
+            morceaux = selectionner_morceaux(resultat_jointure_spatiale, rang, geodatabase_temporaire)
+            fusion_donnees = merge_donnees(morceaux, donnees_entree, geodatabase_temporaire)
+        else:
+            # Aucune lacune à combler : la dissolution porte sur les seules données d'entrée
+            fusion_donnees = donnees_entree
+        dissolve_avec_statistiques = dissoudre_avec_statistiques(fusion_donnees, geodatabase_temporaire, nom_seuil)
+        exporter_resultat(dissolve_avec_statistiques, dossier_sortie)
+
+        duree = time.perf_counter() - debut
+        lignes.append([
+            seuil, len(comblees), round(sum(comblees), 6), round(duree, 1),
+            f"{os.path.basename(dissolve_avec_statistiques)}.shp",
+        ])
+
+    print(f"[{datetime.now()}] Comparaison des seuils (étapes communes : {duree_commune:.1f} s)")
+    for seuil, nb, superficie, duree, _ in lignes:
+        print(f"  {seuil:>10} km² : {nb} lacunes comblées, {superficie} km² réaffectés, {duree} s")
+
+    chemin_csv = os.path.join(dossier_sortie, f"balayage_seuils_{nom_sans_extension}.csv")
+    return ecrire_comparaison(lignes, chemin_csv)
@@ -0,0 +1,300 @@
+import os
+import sqlite3
+import struct
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import arcpy
+
+
+# Extensions des jeux de données vectoriels reconnus ; une géodatabase fichier est un dossier
+EXTENSIONS_VECTEUR = (".shp", ".gpkg", ".geojson", ".kml", ".gml", ".tab", ".mif")
+EXTENSION_GDB = ".gdb"
+# Format enregistré pour chaque classe d'entités d'une géodatabase
+FORMAT_CLASSE_GDB = "gdb_classe"
+CHEMIN_CATALOGUE = os.path.join(os.path.expanduser("~"), ".emodnet_catalogue.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jeux (
+    chemin_norm TEXT PRIMARY KEY,
+    chemin TEXT NOT NULL,
+    nom TEXT NOT NULL,
+    format TEXT NOT NULL,
+    taille INTEGER,
+    mtime_ns INTEGER,
+    nb_entites INTEGER,
+    xmin REAL, ymin REAL, xmax REAL, ymax REAL,
+    passage INTEGER
+);
+CREATE INDEX IF NOT EXISTS jeux_nom ON jeux (nom);
+"""
+
+
+def _normaliser(chemin):
+    return os.path.normcase(os.path.abspath(chemin))
+
+
+def _prefixe(racine):
+    """
+    Préfixe normalisé des chemins situés sous une racine (séparateur final compris).
+    """
+    prefixe = _normaliser(racine)
+    return prefixe if prefixe.endswith(os.sep) else prefixe + os.sep
+
+
+def _decrire_shapefile(chemin):
+    """
+    Lit le nombre d'entités et l'étendue d'un shapefile dans ses en-têtes .shp et .shx.
+    """
+    try:
+        with open(chemin, "rb") as f:
+            entete = f.read(100)
+        xmin, ymin, xmax, ymax = struct.unpack_from("<4d", entete, 36)
+        taille_shx = os.path.getsize(os.path.splitext(chemin)[0] + ".shx")
+        return (taille_shx - 100) // 8, xmin, ymin, xmax, ymax
+    except (OSError, struct.error):
+        return None, None, None, None, None
+
+
+def _statistiques_geodatabase(chemin):
+    """
+    Taille totale et date de modification la plus récente des fichiers d'une géodatabase fichier.
+
+    La date du dossier seul ne change pas quand une table est modifiée sur place ; les fichiers
+    internes sont donc lus (un seul niveau, une géodatabase fichier n'a pas de sous-dossier).
+    """
+    taille, mtime_ns = 0, os.stat(chemin).st_mtime_ns
+    with os.scandir(chemin) as entrees:
+        for entree in entrees:
+            if entree.is_file(follow_symlinks=False):
+                statistiques = entree.stat(follow_symlinks=False)
+                taille += statistiques.st_size
+                mtime_ns = max(mtime_ns, statistiques.st_mtime_ns)
+    return taille, mtime_ns
+
+
+def _decrire_jeu(chemin):
+    """
+    Lit le nombre d'entités et l'étendue d'un jeu de données lisible par ArcGIS (GeoJSON, KML,
+    GML, MapInfo...) avec Describe et GetCount.
+    """
+    try:
+        etendue = arcpy.Describe(chemin).extent
+        nb_entites = int(arcpy.management.GetCount(chemin)[0])
+        return nb_entites, etendue.XMin, etendue.YMin, etendue.XMax, etendue.YMax
+    except (arcpy.ExecuteError, OSError, RuntimeError, AttributeError):
+        # Format non lu par ArcGIS ou fichier verrouillé : le jeu reste catalogué sans description
+        return None, None, None, None, None
+
+
+def _decrire_geodatabase(chemin):
+    """
+    Décrit les classes d'entités d'une géodatabase fichier (jeux de classes d'entités compris)
+    ou d'un GeoPackage.
+
+    :return: Liste de tuples (chemin de la classe, nb d'entités, xmin, ymin, xmax, ymax).
+    """
+    classes = []
+    try:
+        for dossier, _, noms in arcpy.da.Walk(chemin, datatype="FeatureClass"):
+            for nom in noms:
+                chemin_classe = os.path.join(dossier, nom)
+                try:
+                    etendue = arcpy.Describe(chemin_classe).extent
+                    nb_entites = int(arcpy.management.GetCount(chemin_classe)[0])
+                except (arcpy.ExecuteError, OSError, RuntimeError):
+                    continue
+                classes.append((chemin_classe, nb_entites, etendue.XMin, etendue.YMin, etendue.XMax, etendue.YMax))
+    except (OSError, RuntimeError):
+        # Géodatabase verrouillée ou corrompue : seule son entrée est enregistrée
+        pass
+    return classes
+
+
+def _parcourir_dossier(dossier):
+    """
+    Liste un dossier (un seul niveau) avec scandir.
+
+    :return: Tuple (sous-dossiers à parcourir, jeux trouvés sous forme (chemin, format, taille, mtime_ns),
+             chemins illisibles).
+    """
+    sous_dossiers, jeux, illisibles = [], [], []
+    try:
+        with os.scandir(dossier) as entrees:
+            for entree in entrees:
+                try:
+                    extension = os.path.splitext(entree.name)[1].lower()
+                    if entree.is_dir(follow_symlinks=False):
+                        if extension == EXTENSION_GDB:
+                            jeux.append((entree.path, "gdb", *_statistiques_geodatabase(entree.path)))
+                        else:
+                            sous_dossiers.append(entree.path)
+                    elif extension in EXTENSIONS_VECTEUR:
+                        statistiques = entree.stat(follow_symlinks=False)
+                        jeux.append((entree.path, extension[1:], statistiques.st_size, statistiques.st_mtime_ns))
+                except OSError:
+                    illisibles.append(entree.path)
+    except OSError:
+        # Dossier illisible (droits, disque réseau indisponible) : son contenu connu est conservé
+        illisibles.append(dossier)
+    return sous_dossiers, jeux, illisibles
+
+
+class Catalogue:
+    """
+    Catalogue local des jeux de données vectoriels, stocké dans une base SQLite.
+
+    L'indexation parcourt les racines en parallèle avec scandir et ne relit l'en-tête d'un
+    jeu que si sa taille ou sa date de modification a changé depuis le passage précédent.
+    Les recherches par nom, motif ou étendue interrogent ensuite la base sans parcourir le disque.
+    """
+
+    def __init__(self, chemin_base=CHEMIN_CATALOGUE):
+        self.chemin_base = chemin_base
+        self._connexion = sqlite3.connect(chemin_base)
+        self._connexion.executescript(_SCHEMA)
+
+    def fermer(self):
+        self._connexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def indexer(self, racines, nb_taches=None):
+        """
+        Met à jour le catalogue pour les racines données.
+
+        :param racines: Liste des dossiers à parcourir récursivement.
+        :param nb_taches: Nombre de dossiers listés en parallèle.
+        :return: Nombre de jeux de données présents sous ces racines.
+        """
+        nb_taches = nb_taches or min(32, (os.cpu_count() or 1) + 4)
+        passage = int(datetime.now().timestamp() * 1e6)
+        connus = {}
+        for racine in racines:
+            prefixe = _prefixe(racine)
+            for chemin_norm, taille, mtime_ns in self._connexion.execute(
+                "SELECT chemin_norm, taille, mtime_ns FROM jeux WHERE substr(chemin_norm, 1, ?) = ?",
+                (len(prefixe), prefixe),
+            ):
+                connus[chemin_norm] = (taille, mtime_ns)
+
+        print(f"[{datetime.now()}] Indexation des jeux de données sous {', '.join(racines)}")
+        inchanges, modifies, illisibles, geodatabases_inchangees = [], [], [], []
+        with ThreadPoolExecutor(max_workers=nb_taches) as executeur:
+            en_cours = {executeur.submit(_parcourir_dossier, racine) for racine in racines}
+            while en_cours:
+                termines, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+                for tache in termines:
+                    sous_dossiers, jeux, chemins_illisibles = tache.result()
+                    illisibles.extend(chemins_illisibles)
+                    en_cours.update(executeur.submit(_parcourir_dossier, d) for d in sous_dossiers)
+                    for chemin, format_jeu, taille, mtime_ns in jeux:
+                        chemin_norm = _normaliser(chemin)
+                        if connus.get(chemin_norm) == (taille, mtime_ns):
+                            inchanges.append((passage, chemin_norm))
+                            if format_jeu == "gdb":
+                                geodatabases_inchangees.append(chemin)
+                        else:
+                            modifies.append((chemin, chemin_norm, format_jeu, taille, mtime_ns))
+
+        # Seuls les jeux nouveaux ou modifiés sont décrits de nouveau
+        lignes = []
+        for chemin, chemin_norm, format_jeu, taille, mtime_ns in modifies:
+            description = (None,) * 5
+            if format_jeu == "shp":
+                description = _decrire_shapefile(chemin)
+            elif format_jeu in ("gdb", "gpkg"):
+                # Géodatabase : une ligne par classe d'entités. Géodatabase et GeoPackage reçoivent
+                # le total et l'étendue commune de leurs classes.
+                classes = _decrire_geodatabase(chemin)
+                if format_jeu == "gdb":
+                    for chemin_classe, *description_classe in classes:
+                        lignes.append((_normaliser(chemin_classe), chemin_classe,
+                                       os.path.basename(chemin_classe).lower(), FORMAT_CLASSE_GDB,
+                                       taille, mtime_ns, *description_classe, passage))
+                if classes:
+                    description = (
+                        sum(c[1] for c in classes),
+                        min(c[2] for c in classes), min(c[3] for c in classes),
+                        max(c[4] for c in classes), max(c[5] for c in classes),
+                    )
+            else:
+                description = _decrire_jeu(chemin)
+            lignes.append((chemin_norm, chemin, os.path.basename(chemin).lower(), format_jeu,
+                           taille, mtime_ns, *description, passage))
+
+        with self._connexion:
+            self._connexion.executemany("UPDATE jeux SET passage = ? WHERE chemin_norm = ?", inchanges)
+            self._connexion.executemany(
+                "INSERT OR REPLACE INTO jeux VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", lignes
+            )
+            # Les classes d'une géodatabase inchangée sont conservées avec elle
+            for chemin in geodatabases_inchangees:
+                prefixe = _prefixe(chemin)
+                self._connexion.execute(
+                    "UPDATE jeux SET passage = ? WHERE substr(chemin_norm, 1, ?) = ?",
+                    (passage, len(prefixe), prefixe),
+                )
+            # Un dossier illisible n'est pas un dossier vide : les jeux connus dessous sont conservés
+            for chemin in illisibles:
+                prefixe = _prefixe(chemin)
+                self._connexion.execute(
+                    "UPDATE jeux SET passage = ? WHERE chemin_norm = ? OR substr(chemin_norm, 1, ?) = ?",
+                    (passage, _normaliser(chemin), len(prefixe), prefixe),
+                )
+            # Les jeux disparus depuis le passage précédent sont retirés
+            for racine in racines:
+                prefixe = _prefixe(racine)
+                self._connexion.execute(
+                    "DELETE FROM jeux WHERE substr(chemin_norm, 1, ?) = ? AND passage != ?",
+                    (len(prefixe), prefixe, passage),
+                )
+
+        total = len(inchanges) + len(modifies)
+        print(f"[{datetime.now()}] Catalogue à jour : {total} jeux ({len(modifies)} nouveaux ou modifiés)")
+        if illisibles:
+            print(f"[{datetime.now()}] Attention : {len(illisibles)} chemin(s) illisible(s), "
+                  f"entrées précédentes conservées (ex : {illisibles[0]})")
+        return total
+
+    def rechercher(self, nom=None, motif=None, etendue=None, racine=None, format_jeu=None):
+        """
+        Recherche des jeux de données dans le catalogue.
+
+        :param nom: Nom exact du fichier (ex : 'exemple.shp'), sans distinction de casse.
+        :param motif: Motif de nom avec jokers (ex : '*_2024*.shp').
+        :param etendue: (xmin, ymin, xmax, ymax) que l'étendue du jeu doit intersecter.
+        :param racine: Dossier sous lequel le jeu doit se trouver.
+        :param format_jeu: Format attendu ('shp', 'gpkg', 'gdb', 'gdb_classe', ...).
+        :return: Liste de dictionnaires décrivant les jeux trouvés, chemins les plus courts en premier.
+        """
+        conditions, parametres = [], []
+        if nom is not None:
+            conditions.append("nom = ?")
+            parametres.append(nom.lower())
+        if motif is not None:
+            conditions.append("nom GLOB ?")
+            parametres.append(motif.lower())
+        if etendue is not None:
+            conditions.append("xmin <= ? AND xmax >= ? AND ymin <= ? AND ymax >= ?")
+            xmin, ymin, xmax, ymax = etendue
+            parametres.extend([xmax, xmin, ymax, ymin])
+        if racine is not None:
+            prefixe = _prefixe(racine)
+            conditions.append("substr(chemin_norm, 1, ?) = ?")
+            parametres.extend([len(prefixe), prefixe])
+        if format_jeu is not None:
+            conditions.append("format = ?")
+            parametres.append(format_jeu.lower())
+
+        requete = "SELECT chemin, format, taille, mtime_ns, nb_entites, xmin, ymin, xmax, ymax FROM jeux"
+        if conditions:
+            requete += " WHERE " + " AND ".join(conditions)
+        requete += " ORDER BY length(chemin), chemin"
+
+        colonnes = ("chemin", "format", "taille", "mtime_ns", "nb_entites", "xmin", "ymin", "xmax", "ymax")
+        return [dict(zip(colonnes, ligne)) for ligne in self._connexion.execute(requete, parametres)]
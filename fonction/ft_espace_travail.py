@@ -0,0 +1,189 @@
+import atexit
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import arcpy
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+SUFFIXE_A_SUPPRIMER = ".a_supprimer"
+
+# Verrous des espaces de travail ouverts par ce processus : {chemin de la géodatabase : fichier}
+_verrous = {}
+
+
+def _verrouiller(chemin_verrou):
+    """
+    Pose un verrou exclusif non bloquant sur un fichier.
+
+    :return: Le fichier ouvert (à garder ouvert tant que le verrou est utile), ou None si
+             le verrou est déjà tenu par un autre processus.
+    """
+    f = open(chemin_verrou, "a+")
+    try:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _deverrouiller(f):
+    try:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+    f.close()
+
+
+def _est_actif(chemin_gdb):
+    """
+    Indique si un espace de travail est encore utilisé par un processus en cours.
+    """
+    chemin_verrou = os.path.splitext(chemin_gdb)[0] + ".lock"
+    if not os.path.exists(chemin_verrou):
+        return False
+    f = _verrouiller(chemin_verrou)
+    if f is None:
+        return True
+    _deverrouiller(f)
+    return False
+
+
+def _taille_dossier(chemin):
+    total = 0
+    for racine, _, fichiers in os.walk(chemin):
+        for fichier in fichiers:
+            try:
+                total += os.path.getsize(os.path.join(racine, fichier))
+            except OSError:
+                pass
+    return total
+
+
+def _supprimer(chemin_gdb):
+    """
+    Retire un espace de travail : renommage immédiat, puis suppression des fichiers.
+    """
+    base = os.path.splitext(chemin_gdb)[0]
+    a_supprimer = chemin_gdb + SUFFIXE_A_SUPPRIMER
+    try:
+        os.replace(chemin_gdb, a_supprimer)
+    except OSError:
+        # Géodatabase encore verrouillée par ArcGIS : elle sera retentée au prochain nettoyage
+        return False
+    shutil.rmtree(a_supprimer, ignore_errors=True)
+    try:
+        os.remove(base + ".lock")
+    except OSError:
+        pass
+    return True
+
+
+def nettoyer_espaces_travail(dossier_scratch, conserver=1, age_max_heures=24, quota_go=20):
+    """
+    Applique la politique de rétention aux espaces de travail inactifs d'un dossier.
+
+    Les espaces actifs (verrou tenu par un processus en cours) ne sont jamais touchés. Parmi
+    les inactifs, les `conserver` plus récents sont gardés s'ils ont moins de `age_max_heures`
+    heures ; les autres sont supprimés. Si le dossier dépasse ensuite `quota_go` gigaoctets,
+    les plus anciens sont supprimés jusqu'à repasser sous le quota.
+
+    :return: Nombre d'espaces de travail supprimés.
+    """
+    if not os.path.isdir(dossier_scratch):
+        return 0
+
+    # Reprise des suppressions interrompues lors d'une exécution précédente
+    for nom in os.listdir(dossier_scratch):
+        if nom.endswith(SUFFIXE_A_SUPPRIMER):
+            shutil.rmtree(os.path.join(dossier_scratch, nom), ignore_errors=True)
+
+    espaces = []
+    for nom in os.listdir(dossier_scratch):
+        chemin = os.path.join(dossier_scratch, nom)
+        if nom.lower().endswith(".gdb") and os.path.isdir(chemin):
+            espaces.append((os.path.getmtime(chemin), chemin))
+    espaces.sort(reverse=True)
+
+    inactifs = [chemin for _, chemin in espaces if not _est_actif(chemin)]
+    limite = time.time() - age_max_heures * 3600
+    gardes, a_supprimer = [], []
+    for chemin in inactifs:
+        if len(gardes) < conserver and os.path.getmtime(chemin) >= limite:
+            gardes.append(chemin)
+        else:
+            a_supprimer.append(chemin)
+
+    supprimes = sum(_supprimer(chemin) for chemin in a_supprimer)
+
+    # Quota disque : suppression des plus anciens espaces gardés tant qu'il est dépassé
+    quota = quota_go * 1024 ** 3
+    occupation = _taille_dossier(dossier_scratch)
+    while occupation > quota and gardes:
+        chemin = gardes.pop()
+        taille = _taille_dossier(chemin)
+        if _supprimer(chemin):
+            supprimes += 1
+            occupation -= taille
+    if occupation > quota:
+        print(f"[{datetime.now()}] Attention : les espaces de travail actifs dépassent le quota de {quota_go} Go.")
+
+    if supprimes:
+        print(f"[{datetime.now()}] Nettoyage en arrière-plan : {supprimes} espace(s) de travail supprimé(s).")
+    return supprimes
+
+
+def _liberer(chemin_gdb):
+    f = _verrous.pop(chemin_gdb, None)
+    if f is not None:
+        _deverrouiller(f)
+
+
+def creer_espace_travail(dossier_sortie, conserver=1, age_max_heures=24, quota_go=20):
+    """
+    Crée la géodatabase temporaire propre à cette exécution et lance le nettoyage des
+    anciennes en arrière-plan.
+
+    Chaque exécution reçoit une géodatabase au nom unique dans `<dossier_sortie>/scratch`,
+    protégée par un fichier verrou tenu jusqu'à la fin du processus : deux exécutions
+    simultanées n'écrivent donc jamais dans les mêmes données intermédiaires. Le nettoyage
+    (voir nettoyer_espaces_travail) tourne dans un fil d'exécution séparé et ne retarde pas
+    le démarrage.
+
+    :return: Chemin de la géodatabase temporaire créée.
+    """
+    dossier_scratch = os.path.join(dossier_sortie, "scratch")
+    os.makedirs(dossier_scratch, exist_ok=True)
+
+    nom = f"run_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    geodatabase_temporaire = os.path.join(dossier_scratch, f"{nom}.gdb")
+    _verrous[geodatabase_temporaire] = _verrouiller(os.path.join(dossier_scratch, f"{nom}.lock"))
+    atexit.register(_liberer, geodatabase_temporaire)
+
+    arcpy.management.CreateFileGDB(dossier_scratch, f"{nom}.gdb")
+    print(f"Géodatabase temporaire créée : {geodatabase_temporaire}")
+
+    threading.Thread(
+        target=nettoyer_espaces_travail,
+        args=(dossier_scratch, conserver, age_max_heures, quota_go),
+        name="nettoyage_espaces_travail",
+        daemon=True,
+    ).start()
+    return geodatabase_temporaire
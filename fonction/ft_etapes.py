@@ -3,6 +3,18 @@ import os
 from datetime import datetime
 
 
+def ajouter_oid_orig(donnees_entree):
+    """
+    Ajoute le champ OID_ORIG (copie de l'identifiant d'origine) s'il n'existe pas encore.
+    """
+    if "OID_ORIG" not in [f.name for f in arcpy.ListFields(donnees_entree)]:
+        arcpy.management.AddField(donnees_entree, "OID_ORIG", "LONG")
+        with arcpy.da.UpdateCursor(donnees_entree, ["OID@", "OID_ORIG"]) as cur:
+            for row in cur:
+                row[1] = row[0]
+                cur.updateRow(row)
+
+
 def generer_boite_englobante(donnee_entre_v2, geodatabase_temporaire):
     """
     Génère une boîte englobante autour des données d'entrée.
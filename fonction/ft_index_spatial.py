@@ -0,0 +1,24 @@
+import os
+from datetime import datetime
+
+import arcpy
+
+
+def preparer_index_spatial(donnees_entree):
+    """
+    Crée l'index spatial ArcGIS (.sbn/.sbx) d'un shapefile d'entrée s'il est absent.
+
+    L'index est écrit à côté du shapefile : si ce n'est pas possible (dossier en lecture seule,
+    verrou de schéma), le traitement continue sans index.
+
+    :param donnees_entree: Chemin du shapefile d'entrée (les autres formats sont ignorés).
+    """
+    if not donnees_entree.lower().endswith(".shp"):
+        return
+
+    if not os.path.exists(os.path.splitext(donnees_entree)[0] + ".sbn"):
+        print(f"[{datetime.now()}] Création de l'index spatial ArcGIS de {donnees_entree}")
+        try:
+            arcpy.management.AddSpatialIndex(donnees_entree)
+        except arcpy.ExecuteError as e:
+            print(f"[{datetime.now()}] Index spatial non créé, traitement poursuivi sans index : {e}")
@@ -1,11 +1,17 @@
 import os
 import arcpy
 
+from fonction.ft_espace_travail import creer_espace_travail
+
 
 def initialiser_env():
     """
     Initialise l'environnement ArcPy, crée les dossiers nécessaires et retourne leurs chemins.
 
+    La géodatabase temporaire est propre à chaque exécution (voir creer_espace_travail) :
+    elle est créée vide, sans nettoyage au démarrage, et les géodatabases des exécutions
+    précédentes sont supprimées en arrière-plan.
+
     Retourne :
         tuple : Le chemin du dossier racine, du dossier de sortie et de la géodatabase temporaire.
     """
@@ -14,25 +20,6 @@ def initialiser_env():
     dossier_sortie = os.path.join(dossier_racine, "output")
     os.makedirs(dossier_sortie, exist_ok=True)
 
-    geodatabase_temporaire = os.path.join(dossier_sortie, "temp_output.gdb")
-
-    # Si la géodatabase existe, vider son contenu
-    if arcpy.Exists(geodatabase_temporaire):
-        print(f"Nettoyage de la géodatabase temporaire : {geodatabase_temporaire}")
-
-        # Supprimer les datasets si existants
-        datasets = arcpy.ListDatasets("*", "Feature")
-        if datasets:
-            for dataset in datasets:
-                arcpy.management.Delete(dataset)
-
-        # Supprimer les tables si existantes
-        tables = arcpy.ListTables()
-        if tables:
-            for table in tables:
-                arcpy.management.Delete(table)
-    else:
-        arcpy.management.CreateFileGDB(dossier_sortie, "temp_output.gdb")
-        print(f"Géodatabase temporaire créée : {geodatabase_temporaire}")
+    geodatabase_temporaire = creer_espace_travail(dossier_sortie)
 
-    return dossier_racine, dossier_sortie, geodatabase_temporaire
\ No newline at end of file
+    return dossier_racine, dossier_sortie, geodatabase_temporaire
@@ -0,0 +1,429 @@
+import mmap
+import os
+import numpy as np
+
+
+# Types de géométrie du format shapefile (spécification ESRI)
+TYPE_NUL = 0
+TYPES_POINT = (1, 11, 21)
+TYPES_MULTIPOINT = (8, 18, 28)
+TYPES_POLYLIGNE = (3, 13, 23)
+TYPES_POLYGONE = (5, 15, 25)
+
+
+def _projeter(chemin):
+    """
+    Projette un fichier en mémoire en lecture seule. Retourne None pour un fichier vide.
+    """
+    with open(chemin, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _rassembler(vues, positions, comptes, largeur):
+    """
+    Rassemble des blocs de valeurs contigus dispersés dans un fichier projeté.
+
+    :param vues: Vues typées du fichier, une par décalage d'alignement possible.
+    :param positions: Position en octets du début de chaque bloc.
+    :param comptes: Nombre de valeurs de chaque bloc.
+    :param largeur: Taille en octets d'une valeur.
+    :return: Tableau 1D des valeurs mises bout à bout, dans l'ordre des blocs.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    comptes = np.asarray(comptes, dtype=np.int64)
+    total = int(comptes.sum())
+    resultat = np.empty(total, dtype=vues[0].dtype.newbyteorder("="))
+    if total == 0:
+        return resultat
+
+    # Rang de la première valeur de chaque bloc dans le résultat
+    debuts = np.zeros(len(comptes), dtype=np.int64)
+    np.cumsum(comptes[:-1], out=debuts[1:])
+    alignements = positions % largeur
+
+    # Un passage vectorisé par classe d'alignement, sans boucle par enregistrement
+    for decalage in np.unique(alignements):
+        masque = (alignements == decalage) & (comptes > 0)
+        if not masque.any():
+            continue
+        vue = vues[int(decalage)]
+        n = comptes[masque]
+        premier = (positions[masque] - decalage) // largeur
+        sortie = debuts[masque]
+        rang = np.arange(int(n.sum()), dtype=np.int64) - np.repeat(np.cumsum(n) - n, n)
+        resultat[np.repeat(sortie, n) + rang] = vue[np.repeat(premier, n) + rang]
+    return resultat
+
+
+class LecteurShp:
+    """
+    Lecteur de shapefile par projection mémoire (mmap), sans copie des géométries.
+
+    Les fichiers .shp, .shx et .dbf sont projetés en lecture seule : les coordonnées
+    d'une entité sont une vue NumPy directe sur le fichier et seules les pages
+    réellement lues sont chargées par le système. Plusieurs processus peuvent donc
+    partager le même fichier ; le lecteur se sérialise par son chemin et se rouvre
+    de lui-même dans chaque processus de travail.
+
+    Seules les coordonnées XY sont exposées (les valeurs Z et M sont ignorées).
+    """
+
+    def __init__(self, chemin_shp, encodage=None):
+        if not chemin_shp.lower().endswith(".shp"):
+            raise ValueError("Le fichier d'entrée doit avoir l'extension '.shp'.")
+        if not os.path.exists(chemin_shp):
+            raise FileNotFoundError(f"Le fichier '{chemin_shp}' est introuvable.")
+
+        self.chemin_shp = chemin_shp
+        self._encodage = encodage
+        self._ouvrir()
+
+    def _ouvrir(self):
+        base = os.path.splitext(self.chemin_shp)[0]
+        chemin_shx = base + ".shx"
+        if not os.path.exists(chemin_shx):
+            raise FileNotFoundError(f"Le fichier d'index '{chemin_shx}' est introuvable.")
+
+        self._shp = _projeter(self.chemin_shp)
+        self._shx = _projeter(chemin_shx)
+        if self._shp is None or len(self._shp) < 100:
+            raise ValueError(f"Le fichier '{self.chemin_shp}' n'est pas un shapefile valide.")
+        if np.frombuffer(self._shp, dtype=">i4", count=1)[0] != 9994:
+            raise ValueError(f"Le fichier '{self.chemin_shp}' n'est pas un shapefile valide.")
+
+        self.type_geometrie = int(np.frombuffer(self._shp, dtype="<i4", count=1, offset=32)[0])
+        self.etendue = tuple(float(v) for v in np.frombuffer(self._shp, dtype="<f8", count=4, offset=36))
+
+        # Index .shx : (décalage, longueur) en mots de 16 bits, grand-boutiste
+        index = np.frombuffer(self._shx, dtype=">i4", offset=100).reshape(-1, 2)
+        self._decalages = index[:, 0].astype(np.int64) * 2
+        self._longueurs = index[:, 1].astype(np.int64) * 2
+
+        # Une vue typée par alignement possible, toutes sans copie
+        self._octets = np.frombuffer(self._shp, dtype=np.uint8)
+        self._vues_f8 = [np.frombuffer(self._shp, dtype="<f8", offset=k, count=(len(self._shp) - k) // 8)
+                         for k in range(8)]
+        self._vues_i4 = [np.frombuffer(self._shp, dtype="<i4", offset=k, count=(len(self._shp) - k) // 4)
+                         for k in range(4)]
+
+        self._dbf = None
+        self._champs = None
+        chemin_dbf = base + ".dbf"
+        if os.path.exists(chemin_dbf):
+            self._dbf = _projeter(chemin_dbf)
+            self._lire_entete_dbf()
+
+        if self._encodage is None:
+            self._encodage = "latin-1"
+            chemin_cpg = base + ".cpg"
+            if os.path.exists(chemin_cpg):
+                with open(chemin_cpg, "r", encoding="ascii", errors="ignore") as f:
+                    code = f.read().strip()
+                if code:
+                    self._encodage = "utf-8" if code.upper() in ("UTF-8", "UTF8", "65001") else code
+
+    def _lire_entete_dbf(self):
+        """
+        Lit la description des champs du .dbf et prépare une vue structurée sur les enregistrements.
+        """
+        entete = np.frombuffer(self._dbf, dtype=np.uint8, count=32)
+        nb_enregistrements = int(entete[4:8].view("<u4")[0])
+        taille_entete = int(entete[8:10].view("<u2")[0])
+        taille_enregistrement = int(entete[10:12].view("<u2")[0])
+
+        self._champs = {}
+        formats = [("_suppression", "S1")]
+        position = 32
+        while position < taille_entete - 1 and self._dbf[position] != 0x0D:
+            descripteur = self._dbf[position:position + 32]
+            nom = descripteur[:11].split(b"\x00")[0].decode("ascii", errors="replace")
+            type_champ = chr(descripteur[11])
+            longueur = descripteur[16]
+            decimales = descripteur[17]
+            self._champs[nom] = (type_champ, longueur, decimales)
+            formats.append((nom, f"S{longueur}"))
+            position += 32
+
+        self._taille_entete_dbf = taille_entete
+        dtype = np.dtype(formats)
+        if dtype.itemsize != taille_enregistrement:
+            raise ValueError(f"Structure du fichier .dbf incohérente pour '{self.chemin_shp}'.")
+        self._enregistrements = np.frombuffer(
+            self._dbf, dtype=dtype, count=nb_enregistrements, offset=taille_entete
+        )
+
+    def fermer(self):
+        """
+        Libère les projections mémoire.
+        """
+        # Les vues NumPy doivent disparaître avant la fermeture des projections
+        self._vues_f8 = self._vues_i4 = self._octets = None
+        self._decalages = self._longueurs = self._enregistrements = None
+        for projection in (self._shp, self._shx, self._dbf):
+            if projection is not None:
+                try:
+                    projection.close()
+                except BufferError:
+                    # Une vue rendue à l'appelant est encore vivante : le ramasse-miettes s'en chargera
+                    pass
+        self._shp = self._shx = self._dbf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def __getstate__(self):
+        return {"chemin_shp": self.chemin_shp, "_encodage": self._encodage}
+
+    def __setstate__(self, etat):
+        self.__dict__.update(etat)
+        self._ouvrir()
+
+    def __len__(self):
+        return len(self._decalages)
+
+    @property
+    def champs(self):
+        """
+        Dictionnaire {nom : (type dBASE, longueur, décimales)} des champs attributaires.
+        """
+        return dict(self._champs or {})
+
+    def _plage(self, debut, fin, indices):
+        if indices is not None:
+            return np.asarray(indices, dtype=np.int64)
+        n = len(self)
+        debut = 0 if debut is None else max(0, debut)
+        fin = n if fin is None else min(n, fin)
+        return np.arange(debut, max(debut, fin), dtype=np.int64)
+
+    def _entiers(self, positions):
+        return self._octets[positions[:, None] + np.arange(4)].view("<i4").ravel()
+
+    def _types(self, indices):
+        return self._entiers(self._decalages[indices] + 8)
+
+    def boites(self, debut=0, fin=None, indices=None):
+        """
+        Retourne les boîtes englobantes (xmin, ymin, xmax, ymax) des entités, tableau (n, 4).
+        Les entités nulles ont une boîte de NaN.
+        """
+        indices = self._plage(debut, fin, indices)
+        resultat = np.full((len(indices), 4), np.nan)
+        if len(indices) == 0:
+            return resultat
+
+        types = self._types(indices)
+        positions = self._decalages[indices] + 12
+        avec_boite = (types != TYPE_NUL) & ~np.isin(types, TYPES_POINT)
+        if avec_boite.any():
+            resultat[avec_boite] = _rassembler(
+                self._vues_f8, positions[avec_boite], np.full(avec_boite.sum(), 4), 8
+            ).reshape(-1, 4)
+        points = np.isin(types, TYPES_POINT)
+        if points.any():
+            xy = _rassembler(self._vues_f8, positions[points], np.full(points.sum(), 2), 8).reshape(-1, 2)
+            resultat[points] = np.hstack([xy, xy])
+        return resultat
+
+    def selection_etendue(self, xmin, ymin, xmax, ymax, debut=0, fin=None):
+        """
+        Retourne les indices des entités dont la boîte englobante intersecte l'étendue donnée.
+        """
+        indices = self._plage(debut, fin, None)
+        b = self.boites(indices=indices)
+        masque = (b[:, 0] <= xmax) & (b[:, 2] >= xmin) & (b[:, 1] <= ymax) & (b[:, 3] >= ymin)
+        return indices[masque]
+
+    def _structure(self, i):
+        """
+        Retourne (type, nombre de parties, nombre de points, position des parties, position des points).
+        """
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"Entité {i} hors limites ({len(self)} entités).")
+        base = int(self._decalages[i]) + 8
+        type_geom = int(self._vues_i4[base % 4][base // 4])
+        if type_geom == TYPE_NUL:
+            return type_geom, 0, 0, base, base
+        if type_geom in TYPES_POINT:
+            return type_geom, 1, 1, base, base + 4
+        if type_geom in TYPES_MULTIPOINT:
+            nb_points = int(self._vues_i4[(base + 36) % 4][(base + 36) // 4])
+            return type_geom, 1, nb_points, base, base + 40
+        if type_geom in TYPES_POLYLIGNE + TYPES_POLYGONE:
+            nb_parties = int(self._vues_i4[(base + 36) % 4][(base + 36) // 4])
+            nb_points = int(self._vues_i4[(base + 40) % 4][(base + 40) // 4])
+            return type_geom, nb_parties, nb_points, base + 44, base + 44 + 4 * nb_parties
+        raise ValueError(f"Type de géométrie {type_geom} non pris en charge.")
+
+    def coordonnees(self, i):
+        """
+        Retourne les coordonnées de l'entité i sous forme de vue (n, 2) sur le fichier, sans copie.
+        """
+        _, _, nb_points, _, position = self._structure(i)
+        vue = self._vues_f8[position % 8]
+        return vue[position // 8:position // 8 + 2 * nb_points].reshape(-1, 2)
+
+    def parties(self, i):
+        """
+        Retourne le début de chaque partie (anneau) de l'entité i, vue sans copie sur le fichier.
+        """
+        type_geom, nb_parties, _, position, _ = self._structure(i)
+        if type_geom not in TYPES_POLYLIGNE + TYPES_POLYGONE:
+            return np.zeros(nb_parties, dtype=np.int32)
+        vue = self._vues_i4[position % 4]
+        return vue[position // 4:position // 4 + nb_parties]
+
+    def lire_geometries(self, debut=0, fin=None, indices=None):
+        """
+        Lit les géométries d'une plage d'entités sous forme de tableaux plats.
+
+        Retourne :
+            dict : "indices" (entités lues), "coordonnees" (P, 2), "decalages_anneaux" (R + 1)
+            donnant le début de chaque anneau dans les coordonnées, et "decalages_geometries" (n + 1)
+            donnant le premier anneau de chaque entité.
+        """
+        indices = self._plage(debut, fin, indices)
+        n = len(indices)
+        nb_parties = np.zeros(n, dtype=np.int64)
+        nb_points = np.zeros(n, dtype=np.int64)
+        pos_parties = np.zeros(n, dtype=np.int64)
+        pos_points = np.zeros(n, dtype=np.int64)
+        avec_parties = np.zeros(n, dtype=bool)
+
+        if n:
+            types = self._types(indices)
+            base = self._decalages[indices] + 8
+            multi = np.isin(types, TYPES_POLYLIGNE + TYPES_POLYGONE)
+            if multi.any():
+                nb_parties[multi] = self._entiers(base[multi] + 36)
+                nb_points[multi] = self._entiers(base[multi] + 40)
+                pos_parties[multi] = base[multi] + 44
+                pos_points[multi] = base[multi] + 44 + 4 * nb_parties[multi]
+                avec_parties[multi] = True
+            mpoints = np.isin(types, TYPES_MULTIPOINT)
+            if mpoints.any():
+                nb_parties[mpoints] = 1
+                nb_points[mpoints] = self._entiers(base[mpoints] + 36)
+                pos_points[mpoints] = base[mpoints] + 40
+            points = np.isin(types, TYPES_POINT)
+            nb_parties[points] = 1
+            nb_points[points] = 1
+            pos_points[points] = base[points] + 4
+            autres = ~(multi | mpoints | points | (types == TYPE_NUL))
+            if autres.any():
+                raise ValueError(f"Type de géométrie {int(types[autres][0])} non pris en charge.")
+
+        coordonnees = _rassembler(self._vues_f8, pos_points, 2 * nb_points, 8).reshape(-1, 2)
+
+        # Débuts d'anneaux relatifs à chaque entité, puis rendus absolus
+        debuts_points = np.zeros(n, dtype=np.int64)
+        np.cumsum(nb_points[:-1], out=debuts_points[1:])
+        parties = np.zeros(int(nb_parties.sum()), dtype=np.int64)
+        decalages_geometries = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(nb_parties, out=decalages_geometries[1:])
+        lues = _rassembler(self._vues_i4, pos_parties[avec_parties], nb_parties[avec_parties], 4)
+        masque_parties = np.repeat(avec_parties, nb_parties)
+        parties[masque_parties] = lues
+        parties += np.repeat(debuts_points, nb_parties)
+
+        decalages_anneaux = np.empty(len(parties) + 1, dtype=np.int64)
+        decalages_anneaux[:-1] = parties
+        decalages_anneaux[-1] = len(coordonnees)
+
+        return {
+            "indices": indices,
+            "coordonnees": coordonnees,
+            "decalages_anneaux": decalages_anneaux,
+            "decalages_geometries": decalages_geometries,
+        }
+
+    def lire_attributs(self, champs=None, debut=0, fin=None, indices=None):
+        """
+        Lit les colonnes du .dbf sous forme de tableaux typés.
+
+        Les champs numériques sans décimales deviennent des entiers (ou des réels si une valeur
+        est vide), les autres numériques des réels (NaN pour les vides), les dates des
+        datetime64[D], les logiques des booléens et les textes des chaînes Unicode.
+
+        :param champs: Liste des champs à lire (tous par défaut).
+        :return: Dictionnaire {nom du champ : tableau}.
+        """
+        if self._dbf is None:
+            raise FileNotFoundError(f"Aucun fichier .dbf associé à '{self.chemin_shp}'.")
+        champs = list(self._champs) if champs is None else champs
+        inconnus = [c for c in champs if c not in self._champs]
+        if inconnus:
+            raise ValueError(f"Champs introuvables dans '{self.chemin_shp}' : {inconnus}")
+
+        indices = self._plage(debut, fin, indices)
+        if len(indices) and indices.max() >= len(self._enregistrements):
+            raise IndexError("Indices d'entités hors limites pour le fichier .dbf.")
+        # Une plage contiguë reste une vue sur le fichier ; seule la conversion copie
+        if len(indices) and np.array_equal(indices, np.arange(indices[0], indices[0] + len(indices))):
+            enregistrements = self._enregistrements[indices[0]:indices[0] + len(indices)]
+        else:
+            enregistrements = self._enregistrements[indices]
+
+        return {nom: self._convertir(enregistrements[nom], *self._champs[nom]) for nom in champs}
+
+    def enregistrements_bruts(self, indices):
+        """
+        Copie les enregistrements .shp bruts (en-tête de 8 octets compris) des entités demandées.
+
+        Retourne :
+            tuple : Les octets mis bout à bout (uint8) et la longueur de chaque enregistrement.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        longueurs = self._longueurs[indices] + 8
+        octets = _rassembler([self._octets], self._decalages[indices], longueurs, 1)
+        return octets, longueurs
+
+    def entete_dbf(self):
+        """
+        Retourne l'en-tête brut du .dbf (description des champs comprise).
+        """
+        if self._dbf is None:
+            raise FileNotFoundError(f"Aucun fichier .dbf associé à '{self.chemin_shp}'.")
+        return bytes(self._dbf[:self._taille_entete_dbf])
+
+    def lignes_dbf_brutes(self, indices):
+        """
+        Copie les lignes .dbf brutes des entités demandées, tableau uint8 (n, taille d'une ligne).
+        """
+        if self._dbf is None:
+            raise FileNotFoundError(f"Aucun fichier .dbf associé à '{self.chemin_shp}'.")
+        lignes = self._enregistrements.view(np.uint8).reshape(len(self._enregistrements), self._enregistrements.dtype.itemsize)
+        return lignes[np.asarray(indices, dtype=np.int64)]
+
+    def _convertir(self, brut, type_champ, longueur, decimales):
+        """
+        Convertit une colonne brute (octets à largeur fixe) vers son type NumPy.
+        """
+        if type_champ in ("N", "F"):
+            valeurs = np.char.strip(brut)
+            vides = (valeurs == b"") | np.char.startswith(valeurs, b"*")
+            valeurs = np.where(vides, b"0", valeurs)
+            if decimales == 0 and longueur < 19 and not vides.any():
+                return valeurs.astype(np.int64)
+            resultat = valeurs.astype(np.float64)
+            resultat[vides] = np.nan
+            return resultat
+        if type_champ == "L":
+            return np.isin(np.char.strip(brut), [b"T", b"t", b"Y", b"y"])
+        if type_champ == "D":
+            valeurs = np.char.strip(brut)
+            vides = valeurs == b""
+            dates = np.where(vides, b"19700101", valeurs).astype(np.int64)
+            annees = (dates // 10000 - 1970).astype("datetime64[Y]")
+            mois = annees + (dates // 100 % 100 - 1).astype("timedelta64[M]")
+            resultat = mois.astype("datetime64[D]") + (dates % 100 - 1).astype("timedelta64[D]")
+            resultat[vides] = np.datetime64("NaT")
+            return resultat
+        if type_champ == "C":
+            return np.char.rstrip(np.char.decode(brut, self._encodage, errors="replace"))
+        return brut
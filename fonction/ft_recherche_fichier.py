@@ -1,12 +1,27 @@
 import os
 
+from fonction.ft_catalogue import Catalogue, EXTENSIONS_VECTEUR
+
 # Fonction pour rechercher un fichier sur tout l'ordinateur
 def recherche_fichier(nom_fichier, repertoire_base="C:\\"):
     """
     Recherche récursive d'un fichier sur tout l'ordinateur (ou un répertoire de base donné).
+
+    Les jeux de données vectoriels sont cherchés dans le catalogue local ; le répertoire de base
+    n'est parcouru (en parallèle, et seulement pour mettre à jour le catalogue) que si le
+    fichier n'y figure pas encore. Les autres fichiers sont cherchés par un parcours complet.
     """
     print(f"Recherche du fichier '{nom_fichier}' dans {repertoire_base}...")
-    for racine, dossiers, fichiers in os.walk(repertoire_base):
-        if nom_fichier in fichiers:
-            return os.path.join(racine, nom_fichier)
-    return None
\ No newline at end of file
+    if os.path.splitext(nom_fichier)[1].lower() not in EXTENSIONS_VECTEUR:
+        for racine, dossiers, fichiers in os.walk(repertoire_base):
+            if nom_fichier in fichiers:
+                return os.path.join(racine, nom_fichier)
+        return None
+
+    with Catalogue() as catalogue:
+        trouves = [j["chemin"] for j in catalogue.rechercher(nom=nom_fichier, racine=repertoire_base)]
+        trouves = [chemin for chemin in trouves if os.path.exists(chemin)]
+        if not trouves:
+            catalogue.indexer([repertoire_base])
+            trouves = [j["chemin"] for j in catalogue.rechercher(nom=nom_fichier, racine=repertoire_base)]
+    return trouves[0] if trouves else None
@@ -0,0 +1,764 @@
+import os
+import re
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from fonction.ft_lecture_shp import LecteurShp
+
+
+def _rangs(comptes):
+    """
+    Pour des groupes de tailles `comptes` mis bout à bout, rang de chaque élément dans son groupe.
+    """
+    comptes = np.asarray(comptes, dtype=np.int64)
+    return np.arange(int(comptes.sum()), dtype=np.int64) - np.repeat(np.cumsum(comptes) - comptes, comptes)
+
+
+def _orientation(ax, ay, bx, by, cx, cy):
+    """
+    Signe du produit vectoriel (B - A) x (C - A) pour des coordonnées entières, calculé exactement.
+    """
+    ux, uy = bx - ax, by - ay
+    vx, vy = cx - ax, cy - ay
+    p1 = ux.astype(np.float64) * vy
+    p2 = uy.astype(np.float64) * vx
+    resultat = np.sign(p1 - p2)
+    # Sous 2**53, les produits sont exacts en flottants et le signe de la différence aussi ;
+    # au-delà, les cas presque alignés sont recalculés en entiers Python
+    douteux = np.flatnonzero(
+        (np.maximum(np.abs(p1), np.abs(p2)) >= 2.0 ** 53)
+        & (np.abs(p1 - p2) <= (np.abs(p1) + np.abs(p2)) * 1e-12)
+    )
+    for i in douteux:
+        resultat[i] = np.sign(int(ux[i]) * int(vy[i]) - int(uy[i]) * int(vx[i]))
+    return resultat
+
+
+def _cellules(xmin, ymin, xmax, ymax, taille):
+    """
+    Répartit des boîtes sur une grille de cellules carrées.
+
+    :return: Tuple (indice de la boîte, colonne, ligne) pour chaque cellule touchée par chaque boîte.
+    """
+    x0, y0 = np.floor_divide(xmin, taille), np.floor_divide(ymin, taille)
+    nx = np.floor_divide(xmax, taille) - x0 + 1
+    ny = np.floor_divide(ymax, taille) - y0 + 1
+    comptes = (nx * ny).astype(np.int64)
+    elements = np.repeat(np.arange(len(xmin), dtype=np.int64), comptes)
+    k = _rangs(comptes)
+    largeurs = np.repeat(nx, comptes)
+    return elements, np.repeat(x0, comptes) + k % largeurs, np.repeat(y0, comptes) + k // largeurs
+
+
+def _cellules_segments(ax, ay, bx, by, marge, taille):
+    """
+    Répartit des segments sur une grille de cellules carrées, en ne retenant que les cellules
+    proches du segment lui-même et non toute sa boîte englobante.
+
+    Chaque segment est découpé en morceaux d'au plus une cellule de long ; chaque morceau,
+    élargi de `marge`, ne touche que quelques cellules. Le nombre d'entrées croît donc avec la
+    longueur du segment, et non avec le carré de sa longueur pour une arête en diagonale.
+
+    :return: Tuple (indice du segment, colonne, ligne), sans doublon.
+    """
+    dx, dy = (bx - ax).astype(np.float64), (by - ay).astype(np.float64)
+    nb_morceaux = np.maximum(np.ceil(np.maximum(np.abs(dx), np.abs(dy)) / taille), 1).astype(np.int64)
+    segment = np.repeat(np.arange(len(ax), dtype=np.int64), nb_morceaux)
+    rang = _rangs(nb_morceaux)
+    debut = rang / nb_morceaux[segment]
+    fin = (rang + 1) / nb_morceaux[segment]
+    x0, x1 = ax[segment] + debut * dx[segment], ax[segment] + fin * dx[segment]
+    y0, y1 = ay[segment] + debut * dy[segment], ay[segment] + fin * dy[segment]
+
+    morceaux, cx, cy = _cellules(np.minimum(x0, x1) - marge, np.minimum(y0, y1) - marge,
+                                 np.maximum(x0, x1) + marge, np.maximum(y0, y1) + marge, taille)
+    elements = segment[morceaux]
+    if len(elements) == 0:
+        return elements, cx, cy
+    # Morceaux consécutifs d'un même segment : cellules en double retirées
+    ordre = np.lexsort((cy, cx, elements))
+    elements, cx, cy = elements[ordre], cx[ordre], cy[ordre]
+    nouveau = np.r_[True, (elements[1:] != elements[:-1]) | (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])]
+    return elements[nouveau], cx[nouveau], cy[nouveau]
+
+
+def _paires_candidates(ax, ay, bx, by, tolerance, taille):
+    """
+    Paires de segments dont les boîtes (élargies de la tolérance) se chevauchent et qui
+    partagent au moins une cellule de la grille.
+    """
+    xmin, xmax = np.minimum(ax, bx) - tolerance, np.maximum(ax, bx) + tolerance
+    ymin, ymax = np.minimum(ay, by) - tolerance, np.maximum(ay, by) + tolerance
+    elements, cx, cy = _cellules_segments(ax, ay, bx, by, tolerance, taille)
+    if len(elements) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    cles = (cx - cx.min()) * (cy.max() - cy.min() + 1) + (cy - cy.min())
+    ordre = np.argsort(cles, kind="stable")
+    cles, elements = cles[ordre], elements[ordre]
+    debuts = np.flatnonzero(np.r_[True, cles[1:] != cles[:-1]])
+    tailles = np.diff(np.r_[debuts, len(cles)])
+    groupe = np.repeat(np.arange(len(debuts)), tailles)
+
+    # Chaque élément est apparié aux éléments suivants de sa cellule
+    suivants = tailles[groupe] - 1 - (np.arange(len(cles)) - debuts[groupe])
+    i = np.repeat(np.arange(len(cles), dtype=np.int64), suivants)
+    j = i + 1 + _rangs(suivants)
+    s, t = np.minimum(elements[i], elements[j]), np.maximum(elements[i], elements[j])
+    paires = np.unique(s[s != t] * len(ax) + t[s != t])
+    s, t = paires // len(ax), paires % len(ax)
+
+    chevauche = (xmin[s] <= xmax[t]) & (xmin[t] <= xmax[s]) & (ymin[s] <= ymax[t]) & (ymin[t] <= ymax[s])
+    return s[chevauche], t[chevauche]
+
+
+def _regrouper_sommets(ax, ay, bx, by, tolerance):
+    """
+    Accroche entre eux les sommets distants de moins de `tolerance` : chaque groupe de sommets
+    proches (de proche en proche) est ramené sur son plus petit sommet.
+    """
+    points, inverse = np.unique(np.vstack([np.column_stack([ax, ay]), np.column_stack([bx, by])]),
+                                axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    x, y = points[:, 0], points[:, 1]
+    # Un point est un segment de longueur nulle : boîtes élargies de la demi-tolérance
+    s, t = _paires_candidates(x, y, x, y, tolerance / 2, int(max(2 * tolerance, 1)))
+    dx, dy = (x[s] - x[t]).astype(np.float64), (y[s] - y[t]).astype(np.float64)
+    proches = dx * dx + dy * dy <= tolerance * tolerance
+    s, t = s[proches], t[proches]
+
+    # Composantes connexes par propagation de la plus petite étiquette
+    etiquettes = np.arange(len(points), dtype=np.int64)
+    while True:
+        precedentes = etiquettes.copy()
+        np.minimum.at(etiquettes, s, etiquettes[t])
+        np.minimum.at(etiquettes, t, etiquettes[s])
+        etiquettes = etiquettes[etiquettes]
+        if np.array_equal(etiquettes, precedentes):
+            break
+
+    points = points[etiquettes[inverse]]
+    n = len(ax)
+    return points[:n, 0], points[:n, 1], points[n:, 0], points[n:, 1]
+
+
+def _sommet_sur_segment(px, py, ax, ay, bx, by, tolerance):
+    """
+    Indique si le point P est à moins de `tolerance` de l'intérieur du segment AB (extrémités exclues).
+    """
+    dx, dy = (bx - ax).astype(np.float64), (by - ay).astype(np.float64)
+    wx, wy = (px - ax).astype(np.float64), (py - ay).astype(np.float64)
+    longueur2 = dx * dx + dy * dy
+    u = (wx * dx + wy * dy) / longueur2
+    distance2 = (wx * dy - wy * dx) ** 2 / longueur2
+    extremite = ((px == ax) & (py == ay)) | ((px == bx) & (py == by))
+    return ~extremite & (u > 0) & (u < 1) & (distance2 <= tolerance * tolerance)
+
+
+def _points_de_coupe(ax, ay, bx, by, s, t, tolerance):
+    """
+    Points où couper les segments : sommets proches d'un autre segment et croisements.
+
+    :return: Tuple (segment à couper, x, y) des points de coupe, en coordonnées de grille.
+    """
+    segments, xs, ys = [], [], []
+
+    # Accrochage sommet-segment, dans les deux sens
+    for coupe, autre in ((s, t), (t, s)):
+        for px, py in ((ax[autre], ay[autre]), (bx[autre], by[autre])):
+            proche = _sommet_sur_segment(px, py, ax[coupe], ay[coupe], bx[coupe], by[coupe], tolerance)
+            segments.append(coupe[proche])
+            xs.append(px[proche])
+            ys.append(py[proche])
+
+    # Croisements francs : le point d'intersection est arrondi sur la grille
+    o1 = _orientation(ax[s], ay[s], bx[s], by[s], ax[t], ay[t])
+    o2 = _orientation(ax[s], ay[s], bx[s], by[s], bx[t], by[t])
+    o3 = _orientation(ax[t], ay[t], bx[t], by[t], ax[s], ay[s])
+    o4 = _orientation(ax[t], ay[t], bx[t], by[t], bx[s], by[s])
+    croise = (o1 * o2 < 0) & (o3 * o4 < 0)
+    if croise.any():
+        s, t = s[croise], t[croise]
+        rx, ry = (bx[s] - ax[s]).astype(np.float64), (by[s] - ay[s]).astype(np.float64)
+        qx, qy = (bx[t] - ax[t]).astype(np.float64), (by[t] - ay[t]).astype(np.float64)
+        wx, wy = (ax[t] - ax[s]).astype(np.float64), (ay[t] - ay[s]).astype(np.float64)
+        k = (wx * qy - wy * qx) / (rx * qy - ry * qx)
+        ix = np.rint(ax[s] + k * rx).astype(np.int64)
+        iy = np.rint(ay[s] + k * ry).astype(np.int64)
+        for coupe in (s, t):
+            interieur = ~(((ix == ax[coupe]) & (iy == ay[coupe])) | ((ix == bx[coupe]) & (iy == by[coupe])))
+            segments.append(coupe[interieur])
+            xs.append(ix[interieur])
+            ys.append(iy[interieur])
+
+    return np.concatenate(segments), np.concatenate(xs), np.concatenate(ys)
+
+
+def _couper(ax, ay, bx, by, origine, coupes, px, py):
+    """
+    Découpe les segments aux points donnés ; les sous-segments héritent de l'origine du segment.
+    """
+    n = len(ax)
+    dx, dy = (bx - ax)[coupes].astype(np.float64), (by - ay)[coupes].astype(np.float64)
+    u = ((px - ax[coupes]) * dx + (py - ay[coupes]) * dy) / (dx * dx + dy * dy)
+
+    segment = np.concatenate([np.arange(n), np.arange(n), coupes])
+    position = np.concatenate([np.zeros(n), np.ones(n), np.clip(u, 1e-12, 1 - 1e-12)])
+    xx = np.concatenate([ax, bx, px])
+    yy = np.concatenate([ay, by, py])
+    ordre = np.lexsort((position, segment))
+    segment, xx, yy = segment[ordre], xx[ordre], yy[ordre]
+
+    suite = (segment[1:] == segment[:-1]) & ((xx[1:] != xx[:-1]) | (yy[1:] != yy[:-1]))
+    return xx[:-1][suite], yy[:-1][suite], xx[1:][suite], yy[1:][suite], origine[segment[:-1][suite]]
+
+
+def _etiqueter_cycles(suivant):
+    """
+    Étiquette les cycles d'une permutation par le plus petit indice du cycle (doublement de pointeurs).
+    """
+    etiquettes = np.arange(len(suivant), dtype=np.int64)
+    pointeurs = suivant.copy()
+    while True:
+        nouvelles = np.minimum(etiquettes, etiquettes[pointeurs])
+        if np.array_equal(nouvelles, etiquettes):
+            return etiquettes
+        etiquettes = nouvelles
+        pointeurs = pointeurs[pointeurs]
+
+
+def _coordonnees_equivalentes(chemin_shp):
+    """
+    Retourne une fonction convertissant des coordonnées (x, y) du système de la couche en
+    coordonnées planes en km, d'après le .prj, dans lesquelles la formule de l'aire donne
+    la superficie en km².
+
+    Pour un système géographique, la projection cylindrique équivalente de Lambert sur
+    l'ellipsoïde (SPHEROID du .prj, WGS 84 par défaut) conserve exactement les superficies ;
+    seuls les côtés diffèrent des géodésiques utilisées par AREA_GEODESIC, un écart
+    négligeable pour des faces de moins de quelques kilomètres. Pour un système projeté, la
+    superficie est planimétrique : l'écart avec AREA_GEODESIC est celui du facteur d'échelle
+    de la projection (nul pour une projection équivalente, au plus 0,2 % en UTM).
+    """
+    chemin_prj = os.path.splitext(chemin_shp)[0] + ".prj"
+    wkt = ""
+    if os.path.exists(chemin_prj):
+        with open(chemin_prj, "r", encoding="ascii", errors="ignore") as f:
+            wkt = f.read().strip()
+    if wkt.upper().startswith("GEOGCS"):
+        ellipsoide = re.search(r'SPHEROID\["[^"]*",\s*([0-9.eE+-]+),\s*([0-9.eE+-]+)', wkt)
+        a, inverse_aplatissement = (float(v) for v in ellipsoide.groups()) if ellipsoide else (6378137.0, 298.257223563)
+        aplatissement = 1 / inverse_aplatissement if inverse_aplatissement else 0.0
+        e = np.sqrt(aplatissement * (2 - aplatissement))
+
+        def convertir(x, y):
+            sinus = np.sin(np.radians(y))
+            if e > 0:
+                q = (1 - e ** 2) * (sinus / (1 - (e * sinus) ** 2)
+                                    + np.arctanh(e * sinus) / e)
+            else:
+                q = 2 * sinus
+            # x * y' est une superficie : a * longitude (rad) et a * q / 2 ont pour produit a² q dλ / 2
+            return a * np.radians(x) / 1000, a * q / 2 / 1000
+        return convertir
+    unites = re.findall(r'UNIT\["[^"]*",\s*([0-9.eE+-]+)', wkt)
+    metres = float(unites[-1]) if unites else 1.0
+    return lambda x, y: (x * metres / 1000, y * metres / 1000)
+
+
+class Topologie:
+    """
+    Représentation topologique d'une couverture de polygones : sommets, arêtes partagées,
+    faces et propriétaires de chaque face.
+
+    Chaque limite entre deux polygones voisins n'existe qu'une fois (arête partagée), après
+    accrochage des coordonnées sur une grille de précision fixe et des sommets sur les
+    segments voisins. Une face est une région élémentaire du plan délimitée par les arêtes ;
+    ses propriétaires sont les entités d'entrée qui la recouvrent. Une lacune est une face
+    sans propriétaire, un recouvrement une face à plusieurs propriétaires.
+
+    Attributs principaux :
+        precision : taille de la grille (unités du système de coordonnées).
+        ids : identifiant (OID_ORIG ou rang) de chaque entité d'entrée.
+        proprietaires : liste des ensembles d'entités (rangs) propriétaires de chaque face.
+        superficies_km2 : superficie de chaque face, îlots déduits.
+        affectation : entité retenue pour chaque face (-1 : aucune), voir reaffecter_faces.
+    """
+
+    def __init__(self, chemin_shp, precision, tolerance, champ_id):
+        self.chemin_shp = chemin_shp
+        self.precision = precision
+        print(f"[{datetime.now()}] Construction de la topologie (grille de {precision}) : {chemin_shp}")
+
+        with LecteurShp(chemin_shp) as lecteur:
+            geometries = lecteur.lire_geometries()
+            nb_entites = len(lecteur)
+            if champ_id in lecteur.champs:
+                self.ids = lecteur.lire_attributs([champ_id])[champ_id]
+            else:
+                self.ids = np.arange(nb_entites)
+
+        ax, ay, bx, by, entite = self._segments(geometries)
+        tolerance_grille = max(tolerance / precision, 0.5)
+        ax, ay, bx, by, origine = self._noder(ax, ay, bx, by, tolerance_grille)
+        self._construire_graphe(ax, ay, bx, by, entite[origine], nb_entites)
+        if len(self.aretes) == 0:
+            raise ValueError(f"La couche '{chemin_shp}' ne contient aucun contour de polygone.")
+        self._tracer_faces()
+        self._resoudre_ilots()
+        self._calculer_proprietaires()
+
+        x, y = _coordonnees_equivalentes(chemin_shp)(self.sommets[:, 0] * precision, self.sommets[:, 1] * precision)
+        superficies = self._superficies_signees(np.column_stack((x, y)))
+        # Les îlots contenus dans une face sont déduits de sa superficie
+        self.superficies_km2 = superficies.copy()
+        for face_exterieure, contenant in enumerate(self._contenant):
+            if contenant >= 0:
+                self.superficies_km2[contenant] += superficies[face_exterieure]
+        self.affectation = None
+
+        nb_lacunes = len(self.lacunes())
+        nb_recouvrements = len(self.recouvrements())
+        print(f"[{datetime.now()}] Topologie : {len(self.sommets)} sommets, {len(self.aretes)} arêtes, "
+              f"{self.nb_faces} faces, {nb_lacunes} lacunes, {nb_recouvrements} recouvrements")
+
+    def _segments(self, geometries):
+        """
+        Convertit les anneaux en segments sur la grille de précision.
+        """
+        coords = np.rint(geometries["coordonnees"] / self.precision).astype(np.int64)
+        anneaux = geometries["decalages_anneaux"]
+        nb_points = np.diff(anneaux)
+        anneau = np.repeat(np.arange(len(nb_points)), nb_points)
+        entite_anneau = np.repeat(np.arange(len(geometries["indices"])), np.diff(geometries["decalages_geometries"]))
+        entite_anneau = geometries["indices"][entite_anneau]
+
+        debut = np.flatnonzero(anneau[:-1] == anneau[1:])
+        fin = debut + 1
+        # Anneaux non fermés dans le fichier : ajout du segment de fermeture
+        premiers, derniers = anneaux[:-1][nb_points > 0], anneaux[1:][nb_points > 0] - 1
+        ouverts = np.any(coords[premiers] != coords[derniers], axis=1)
+        debut = np.concatenate([debut, derniers[ouverts]])
+        fin = np.concatenate([fin, premiers[ouverts]])
+
+        a, b = coords[debut], coords[fin]
+        non_nuls = np.any(a != b, axis=1)
+        a, b = a[non_nuls], b[non_nuls]
+        entite = entite_anneau[anneau[debut[non_nuls]]]
+        return a[:, 0], a[:, 1], b[:, 0], b[:, 1], entite
+
+    def _noder(self, ax, ay, bx, by, tolerance, iterations_max=10):
+        """
+        Découpe les segments à leurs intersections et aux sommets voisins jusqu'à stabilité.
+
+        Au-delà du demi-pas de grille, les sommets proches sont d'abord regroupés entre eux ;
+        la tolérance d'accrochage sommet-segment ne s'applique ensuite qu'à la première passe.
+        Les passes suivantes ne traitent que les sommets créés par l'arrondi des croisements
+        (demi-pas de grille), sans quoi les accrochages successifs de segments courts se
+        propageraient en zigzag.
+        """
+        origine = np.arange(len(ax), dtype=np.int64)
+        if len(ax) == 0:
+            return ax, ay, bx, by, origine
+        if tolerance > 0.5:
+            ax, ay, bx, by = _regrouper_sommets(ax, ay, bx, by, tolerance)
+            non_nuls = (ax != bx) | (ay != by)
+            ax, ay, bx, by, origine = ax[non_nuls], ay[non_nuls], bx[non_nuls], by[non_nuls], origine[non_nuls]
+        longueurs = np.hypot((bx - ax).astype(np.float64), (by - ay).astype(np.float64))
+        taille = int(max(np.percentile(longueurs, 75) * 2, 4 * tolerance, 1))
+
+        for iteration in range(iterations_max):
+            if iteration == 1:
+                tolerance = min(tolerance, 0.5)
+            s, t = _paires_candidates(ax, ay, bx, by, tolerance, taille)
+            coupes, px, py = _points_de_coupe(ax, ay, bx, by, s, t, tolerance)
+            if len(coupes) == 0:
+                break
+            ax, ay, bx, by, origine = _couper(ax, ay, bx, by, origine, coupes, px, py)
+        else:
+            print(f"[{datetime.now()}] Attention : découpage non stabilisé après {iterations_max} passes.")
+        return ax, ay, bx, by, origine
+
+    def _construire_graphe(self, ax, ay, bx, by, entite, nb_entites):
+        """
+        Fusionne les segments identiques en arêtes partagées et calcule, pour chaque arête,
+        les entités dont elle est une limite (parité du nombre de passages).
+        """
+        points = np.vstack([np.column_stack([ax, ay]), np.column_stack([bx, by])])
+        self.sommets, inverse = np.unique(points, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        u, v = inverse[:len(ax)], inverse[len(ax):]
+        nb_sommets = len(self.sommets)
+        cles = np.minimum(u, v) * nb_sommets + np.maximum(u, v)
+        cles_aretes, arete = np.unique(cles, return_inverse=True)
+
+        contributions, nb = np.unique(arete * nb_entites + entite, return_counts=True)
+        contributions = contributions[nb % 2 == 1]
+        arete_contrib = contributions // nb_entites
+        # Une arête que toutes ses entités traversent deux fois ne sépare rien : elle est retirée
+        gardees = np.unique(arete_contrib)
+        renumerotation = np.full(len(cles_aretes), -1, dtype=np.int64)
+        renumerotation[gardees] = np.arange(len(gardees))
+
+        self.aretes = np.column_stack([cles_aretes[gardees] // nb_sommets, cles_aretes[gardees] % nb_sommets])
+        self._contrib_entite = contributions % nb_entites
+        self._contrib_debut = np.searchsorted(renumerotation[arete_contrib], np.arange(len(gardees) + 1))
+
+    def entites_arete(self, arete):
+        """
+        Entités (rangs) dont l'arête est une limite.
+        """
+        return self._contrib_entite[self._contrib_debut[arete]:self._contrib_debut[arete + 1]]
+
+    def _tracer_faces(self):
+        """
+        Trace les faces : la demi-arête h (origine -> destination) borde la face à sa gauche.
+        Les demi-arêtes 2e et 2e + 1 sont les deux sens de l'arête e.
+        """
+        nb_aretes = len(self.aretes)
+        self._origine = self.aretes.reshape(-1)
+        self._destination = self.aretes[:, ::-1].reshape(-1)
+        dx = (self.sommets[self._destination, 0] - self.sommets[self._origine, 0]).astype(np.float64)
+        dy = (self.sommets[self._destination, 1] - self.sommets[self._origine, 1]).astype(np.float64)
+        angles = np.arctan2(dy, dx)
+
+        # Demi-arêtes sortantes de chaque sommet, triées dans le sens trigonométrique
+        ordre = np.lexsort((angles, self._origine))
+        position = np.empty(2 * nb_aretes, dtype=np.int64)
+        position[ordre] = np.arange(2 * nb_aretes)
+        premier = np.searchsorted(self._origine[ordre], np.arange(len(self.sommets)))
+        dernier = np.searchsorted(self._origine[ordre], np.arange(len(self.sommets)), side="right") - 1
+
+        # La suivante de h est la sortante qui précède le retour de h autour de la destination
+        retour = np.arange(2 * nb_aretes) ^ 1
+        p = position[retour]
+        origine_retour = self._origine[retour]
+        precedente = np.where(p > premier[origine_retour], p - 1, dernier[origine_retour])
+        self._suivante = ordre[precedente]
+
+        _, self._face = np.unique(_etiqueter_cycles(self._suivante), return_inverse=True)
+        self._face = self._face.ravel()
+        self.nb_faces = int(self._face.max()) + 1 if len(self._face) else 0
+
+        self._superficies_brutes = self._superficies_signees(self.sommets)
+
+    def _superficies_signees(self, coordonnees):
+        """
+        Superficie signée de chaque face pour des coordonnées de sommets données, calculée par
+        rapport à un sommet de chaque face pour rester précise.
+        """
+        reference = np.zeros(self.nb_faces, dtype=np.int64)
+        reference[self._face] = self._origine
+        o = (coordonnees[self._origine] - coordonnees[reference[self._face]]).astype(np.float64)
+        d = (coordonnees[self._destination] - coordonnees[reference[self._face]]).astype(np.float64)
+        produit = o[:, 0] * d[:, 1] - o[:, 1] * d[:, 0]
+        return np.bincount(self._face, weights=produit, minlength=self.nb_faces) / 2
+
+    def _resoudre_ilots(self):
+        """
+        Rattache chaque composante connexe du graphe à la face qui la contient.
+
+        Chaque composante a sa propre face extérieure (superficie négative). Elle est rattachée
+        à la face touchée par un rayon tiré vers la gauche depuis un point situé juste à gauche
+        du sommet le plus à gauche de la composante ; sans rien toucher, elle est à l'extérieur
+        de toute la couverture.
+        """
+        nb_sommets = len(self.sommets)
+        composante = np.arange(nb_sommets, dtype=np.int64)
+        u, v = self.aretes[:, 0], self.aretes[:, 1]
+        while True:
+            avant = composante.copy()
+            minimum = np.minimum(composante[u], composante[v])
+            np.minimum.at(composante, u, minimum)
+            np.minimum.at(composante, v, minimum)
+            composante = composante[composante]
+            if np.array_equal(avant, composante):
+                break
+
+        composante_face = np.empty(self.nb_faces, dtype=np.int64)
+        composante_face[self._face] = composante[self._origine]
+        # Face extérieure de chaque composante : celle de plus petite superficie signée
+        ordre = np.lexsort((self._superficies_brutes, composante_face))
+        composantes, premiers = np.unique(composante_face[ordre], return_index=True)
+        self._faces_exterieures = ordre[premiers]
+        self._exterieure_de_face = self._faces_exterieures[np.searchsorted(composantes, composante_face)]
+        self._contenant = np.full(self.nb_faces, -1, dtype=np.int64)
+        self._est_exterieure = np.zeros(self.nb_faces, dtype=bool)
+        self._est_exterieure[self._faces_exterieures] = True
+
+        # Sommet le plus à gauche (puis le plus bas) de chaque composante
+        utilises = np.unique(self.aretes)
+        ordre_sommets = utilises[np.lexsort((self.sommets[utilises, 1], self.sommets[utilises, 0], composante[utilises]))]
+        _, premiers_sommets = np.unique(composante[ordre_sommets], return_index=True)
+        sommets_gauche = ordre_sommets[premiers_sommets]
+
+        # Grille des arêtes par cellules, pour tirer les rayons
+        a, b = self.sommets[u], self.sommets[v]
+        taille = max(1, int(np.percentile(np.abs(a - b).max(axis=1), 75) * 4)) if len(a) else 1
+        elements, cx, cy = _cellules_segments(a[:, 0], a[:, 1], b[:, 0], b[:, 1], 0, taille)
+        ordre_cellules = np.lexsort((cx, cy))
+        elements, cx, cy = elements[ordre_cellules], cx[ordre_cellules], cy[ordre_cellules]
+
+        for face_exterieure, sommet in zip(self._faces_exterieures, sommets_gauche):
+            qx = self.sommets[sommet, 0] - 0.5
+            qy = self.sommets[sommet, 1] + 0.25
+            ligne = int(np.floor_divide(qy, taille))
+            debut, fin = np.searchsorted(cy, ligne), np.searchsorted(cy, ligne, side="right")
+            colonnes = cx[debut:fin]
+            colonne = int(np.floor_divide(qx, taille))
+            fin_colonne = debut + int(np.searchsorted(colonnes, colonne, side="right"))
+            # Parcours des cellules occupées de la ligne, de droite à gauche
+            while fin_colonne > debut:
+                colonne = cx[fin_colonne - 1]
+                debut_colonne = debut + int(np.searchsorted(colonnes, colonne))
+                candidates = elements[debut_colonne:fin_colonne]
+                pa, pb = a[candidates].astype(np.float64), b[candidates].astype(np.float64)
+                traverse = (pa[:, 1] < qy) != (pb[:, 1] < qy)
+                x = pa[:, 0] + (qy - pa[:, 1]) * (pb[:, 0] - pa[:, 0]) / np.where(traverse, pb[:, 1] - pa[:, 1], 1)
+                valide = traverse & (x < qx) & (x >= colonne * taille)
+                if valide.any():
+                    arete = candidates[valide][np.argmax(x[valide])]
+                    o, d = self.sommets[self.aretes[arete, 0]], self.sommets[self.aretes[arete, 1]]
+                    a_gauche = (d[0] - o[0]) * (qy - o[1]) - (d[1] - o[1]) * (qx - o[0]) > 0
+                    self._contenant[face_exterieure] = self._face[2 * arete + (0 if a_gauche else 1)]
+                    break
+                fin_colonne = debut_colonne
+
+        # Une face extérieure rattachée à la face extérieure d'un autre îlot remonte jusqu'à une vraie face
+        self._effective = np.arange(self.nb_faces + 1, dtype=np.int64)
+        self._effective[np.flatnonzero(self._est_exterieure)] = self.nb_faces
+        for face in self._faces_exterieures:
+            contenant, vues = self._contenant[face], 0
+            while contenant >= 0 and self._est_exterieure[contenant] and vues < self.nb_faces:
+                contenant, vues = self._contenant[contenant], vues + 1
+            self._contenant[face] = contenant
+            self._effective[face] = contenant if contenant >= 0 else self.nb_faces
+
+    def _calculer_proprietaires(self):
+        """
+        Propage les propriétaires de face en face : franchir une arête ajoute ou retire les
+        entités dont elle est une limite. Chaque composante part de sa face extérieure, dont
+        les propriétaires sont ceux de la face qui la contient.
+        """
+        ordre = np.argsort(self._face, kind="stable")
+        debuts = np.searchsorted(self._face[ordre], np.arange(self.nb_faces + 1))
+        self.proprietaires = [None] * self.nb_faces
+
+        def parcourir(depart):
+            contenant = self._contenant[depart]
+            if contenant >= 0 and self.proprietaires[contenant] is None:
+                parcourir(self._exterieure_de_face[contenant])
+            self.proprietaires[depart] = self.proprietaires[contenant] if contenant >= 0 else frozenset()
+            file = deque([depart])
+            while file:
+                face = file.popleft()
+                for h in ordre[debuts[face]:debuts[face + 1]]:
+                    voisine = self._face[h ^ 1]
+                    if self.proprietaires[voisine] is None:
+                        entites = self.entites_arete(h >> 1)
+                        self.proprietaires[voisine] = self.proprietaires[face].symmetric_difference(entites.tolist())
+                        file.append(voisine)
+
+        for face in self._faces_exterieures:
+            if self.proprietaires[face] is None:
+                parcourir(face)
+
+    def _faces_reelles(self):
+        return np.flatnonzero(~self._est_exterieure)
+
+    def lacunes(self):
+        """
+        Faces sans propriétaire (trous de la couverture), hors extérieur.
+        """
+        return np.array([f for f in self._faces_reelles() if not self.proprietaires[f]], dtype=np.int64)
+
+    def recouvrements(self):
+        """
+        Faces recouvertes par plusieurs entités.
+        """
+        return np.array([f for f in self._faces_reelles() if len(self.proprietaires[f]) > 1], dtype=np.int64)
+
+    def reaffecter_faces(self, seuil_superficie=0.5):
+        """
+        Attribue chaque face à une seule entité, sans opération de superposition.
+
+        - Une face à un seul propriétaire lui revient.
+        - Un recouvrement revient à l'entité d'identifiant le plus petit, comme l'entité
+          conservée en premier lors de la gestion des mosaïques.
+        - Une lacune d'au plus `seuil_superficie` km² revient à la face voisine affectée avec
+          laquelle elle partage la plus longue limite ; les lacunes qui ne touchent que
+          d'autres lacunes sont traitées aux passes suivantes. Les lacunes plus grandes restent vides.
+
+        :return: Dictionnaire des statistiques (lacunes comblées, recouvrements résolus,
+                 superficie réaffectée en km²).
+        """
+        affectation = np.full(self.nb_faces + 1, -1, dtype=np.int64)
+        recouvrements = 0
+        for face in self._faces_reelles():
+            proprietaires = self.proprietaires[face]
+            if len(proprietaires) == 1:
+                affectation[face] = next(iter(proprietaires))
+            elif len(proprietaires) > 1:
+                affectation[face] = min(proprietaires, key=lambda e: (self.ids[e], e))
+                recouvrements += 1
+
+        lacunes = self.lacunes()
+        a_combler = np.zeros(self.nb_faces + 1, dtype=bool)
+        a_combler[lacunes[self.superficies_km2[lacunes] <= seuil_superficie]] = True
+
+        # Voisinage entre faces effectives, pondéré par la longueur des arêtes partagées
+        gauche = self._effective[self._face]
+        droite = self._effective[self._face[np.arange(len(self._face)) ^ 1]]
+        vecteurs = (self.sommets[self.aretes[:, 1]] - self.sommets[self.aretes[:, 0]]).astype(np.float64)
+        longueurs = np.repeat(np.hypot(vecteurs[:, 0], vecteurs[:, 1]), 2)
+        comblees = 0
+        while True:
+            candidates = a_combler[gauche] & (affectation[gauche] < 0) & (affectation[droite] >= 0)
+            if not candidates.any():
+                break
+            face, entite = gauche[candidates], affectation[droite[candidates]]
+            cles, inverse = np.unique(face * (len(self.ids) + 1) + entite, return_inverse=True)
+            poids = np.bincount(inverse.ravel(), weights=longueurs[candidates])
+            faces_cles = cles // (len(self.ids) + 1)
+            ordre = np.lexsort((-poids, faces_cles))
+            _, premiers = np.unique(faces_cles[ordre], return_index=True)
+            choisies = ordre[premiers]
+            affectation[faces_cles[choisies]] = cles[choisies] % (len(self.ids) + 1)
+            comblees += len(choisies)
+
+        # Les faces extérieures des îlots suivent la face qui les contient
+        exterieures = np.flatnonzero(self._est_exterieure)
+        affectation[exterieures] = affectation[self._effective[exterieures]]
+        affectation[self.nb_faces] = -1
+        self.affectation = affectation
+
+        superficie = float(self.superficies_km2[lacunes][affectation[lacunes] >= 0].sum()) if len(lacunes) else 0.0
+        print(f"[{datetime.now()}] Réaffectation : {comblees} lacunes comblées ({superficie:.6f} km²), "
+              f"{recouvrements} recouvrements résolus")
+        return {"lacunes_comblees": comblees, "recouvrements_resolus": recouvrements, "superficie_km2": superficie}
+
+    def polygones(self):
+        """
+        Dissout les faces par entité affectée en suivant les arêtes qui séparent deux entités.
+
+        :return: Dictionnaire {rang de l'entité : liste d'anneaux (n, 2)} en coordonnées réelles,
+                 extérieurs dans le sens horaire et trous dans le sens trigonométrique (convention ESRI).
+        """
+        if self.affectation is None:
+            raise ValueError("Les faces doivent être réaffectées (reaffecter_faces) avant la dissolution.")
+        demi = np.arange(len(self._face))
+        gauche = self.affectation[self._face]
+        droite = self.affectation[self._face[demi ^ 1]]
+        bord = (gauche >= 0) & (gauche != droite)
+
+        # Suivante sur le bord : rotation autour de la destination jusqu'à une demi-arête du même bord
+        suivante = np.full(len(demi), -1, dtype=np.int64)
+        en_cours = np.flatnonzero(bord)
+        candidate = self._suivante[en_cours]
+        while len(en_cours):
+            trouvee = bord[candidate] & (gauche[candidate] == gauche[en_cours])
+            suivante[en_cours[trouvee]] = candidate[trouvee]
+            en_cours, candidate = en_cours[~trouvee], self._suivante[candidate[~trouvee] ^ 1]
+
+        resultat = {}
+        visitee = np.zeros(len(demi), dtype=bool)
+        for depart in np.flatnonzero(bord):
+            if visitee[depart]:
+                continue
+            anneau, h = [], depart
+            while not visitee[h]:
+                visitee[h] = True
+                anneau.append(self._origine[h])
+                h = suivante[h]
+            anneau.append(anneau[0])
+            coordonnees = self.sommets[anneau[::-1]] * self.precision
+            resultat.setdefault(int(gauche[depart]), []).append(coordonnees)
+        return resultat
+
+    def arcs(self):
+        """
+        Arcs partagés : chaînes d'arêtes entre deux sommets de jonction (degré différent de 2).
+
+        :return: Tuple (liste des coordonnées réelles de chaque arc, tableau (n, 2) des faces
+                 effectives à gauche et à droite de chaque arc ; -1 pour l'extérieur).
+        """
+        degre = np.bincount(self.aretes.ravel(), minlength=len(self.sommets))
+        visitee = np.zeros(len(self._face), dtype=bool)
+        arcs, faces = [], []
+
+        def suivre(depart):
+            sommets, h = [self._origine[depart]], depart
+            while True:
+                visitee[h] = visitee[h ^ 1] = True
+                sommets.append(self._destination[h])
+                h = self._suivante[h]
+                if degre[self._origine[h]] != 2 or visitee[h]:
+                    break
+            arcs.append(self.sommets[sommets] * self.precision)
+            effectives = self._effective[[self._face[depart], self._face[depart ^ 1]]]
+            faces.append(np.where(effectives == self.nb_faces, -1, effectives))
+
+        for depart in np.flatnonzero(degre[self._origine] != 2):
+            if not visitee[depart]:
+                suivre(depart)
+        # Anneaux isolés sans jonction
+        for depart in range(len(self._face)):
+            if not visitee[depart]:
+                suivre(depart)
+        return arcs, np.array(faces, dtype=np.int64).reshape(-1, 2)
+
+
+def construire_topologie(donnees_entree, precision=None, tolerance=0.0, champ_id="OID_ORIG"):
+    """
+    Construit la topologie (arêtes partagées et faces) d'un shapefile de polygones.
+
+    :param donnees_entree: Chemin du shapefile d'entrée.
+    :param precision: Taille de la grille d'accrochage ; par défaut 1e-9 degré pour un système
+                      géographique, 0,1 mm sinon.
+    :param tolerance: Distance d'accrochage des sommets entre eux et sur les segments voisins
+                      (au moins une demi-case de grille).
+    :param champ_id: Champ identifiant les entités (OID_ORIG par défaut, rang sinon).
+    :return: La topologie construite.
+    """
+    if not donnees_entree.lower().endswith(".shp"):
+        raise ValueError("Le fichier d'entrée doit avoir l'extension '.shp'.")
+    if precision is None:
+        chemin_prj = os.path.splitext(donnees_entree)[0] + ".prj"
+        geographique = False
+        if os.path.exists(chemin_prj):
+            with open(chemin_prj, "r", encoding="ascii", errors="ignore") as f:
+                geographique = f.read().strip().upper().startswith("GEOGCS")
+        precision = 1e-9 if geographique else 1e-4
+    return Topologie(donnees_entree, precision, tolerance, champ_id)
+
+
+def exporter_topologie(topologie, donnees_entree, geodatabase_temporaire, nom_sans_extension):
+    """
+    Écrit les polygones dissous de la topologie dans la géodatabase temporaire, puis y joint
+    les attributs des entités d'entrée par OID_ORIG.
+    """
+    nom_sortie = f"resultat_topologie_{nom_sans_extension}"
+    sortie = os.path.join(geodatabase_temporaire, nom_sortie)
+    print(f"[{datetime.now()}] Export de la topologie : {sortie}")
+
+    # Import local : la construction de la topologie n'a pas besoin d'ArcPy
+    import arcpy
+
+    reference_spatiale = arcpy.Describe(donnees_entree).spatialReference
+    arcpy.management.CreateFeatureclass(
+        geodatabase_temporaire, nom_sortie, "POLYGON", spatial_reference=reference_spatiale
+    )
+    arcpy.management.AddField(sortie, "OID_ORIG", "LONG")
+    with arcpy.da.InsertCursor(sortie, ["SHAPE@", "OID_ORIG"]) as cursor:
+        for entite, anneaux in topologie.polygones().items():
+            parties = arcpy.Array([arcpy.Array([arcpy.Point(x, y) for x, y in anneau]) for anneau in anneaux])
+            cursor.insertRow([arcpy.Polygon(parties, reference_spatiale), int(topologie.ids[entite])])
+
+    champs = [
+        f.name for f in arcpy.ListFields(donnees_entree)
+        if f.type not in ["Geometry", "OID"] and f.name != "OID_ORIG"
+    ]
+    arcpy.management.JoinField(sortie, "OID_ORIG", donnees_entree, "OID_ORIG", champs)
+    return sortie
@@ -0,0 +1,288 @@
+import glob
+import hashlib
+import json
+import os
+import time
+import shutil
+import tempfile
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+from fonction.ft_lecture_shp import LecteurShp
+
+
+_TYPE_CLE = np.dtype([("cle", "<u8"), ("indice", "<i8")])
+# Fichiers constituant la copie ordonnée, et index qui en dépendent
+_EXTENSIONS_COPIE = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+_EXTENSIONS_INDEX = (".sbn", ".sbx")
+# Âge (en secondes) au-delà duquel une copie d'une version antérieure de la source est supprimée
+_DELAI_NETTOYAGE = 24 * 3600
+
+
+def cles_hilbert(x, y, etendue, ordre=16):
+    """
+    Calcule la clé de Hilbert de points (x, y) sur une grille de 2**ordre cases par côté.
+
+    :param x: Tableau des abscisses.
+    :param y: Tableau des ordonnées.
+    :param etendue: (xmin, ymin, xmax, ymax) couvrant tous les points.
+    :param ordre: Nombre de bits par axe (16 par défaut, 32 au plus).
+    :return: Tableau de clés uint64, proches pour des points proches.
+    """
+    cote = 1 << ordre
+    xmin, ymin, xmax, ymax = etendue
+    largeur = max(xmax - xmin, 1e-12)
+    hauteur = max(ymax - ymin, 1e-12)
+    gx = np.clip((np.asarray(x, dtype=np.float64) - xmin) / largeur * (cote - 1), 0, cote - 1).astype(np.uint64)
+    gy = np.clip((np.asarray(y, dtype=np.float64) - ymin) / hauteur * (cote - 1), 0, cote - 1).astype(np.uint64)
+
+    cles = np.zeros(gx.shape, dtype=np.uint64)
+    s = cote >> 1
+    while s > 0:
+        s64 = np.uint64(s)
+        rx = (gx & s64) > 0
+        ry = (gy & s64) > 0
+        cles += s64 * s64 * ((3 * rx.astype(np.uint64)) ^ ry.astype(np.uint64))
+        # Rotation du quadrant pour que la courbe reste continue
+        inverser = ~ry & rx
+        gx[inverser] = np.uint64(cote - 1) - gx[inverser]
+        gy[inverser] = np.uint64(cote - 1) - gy[inverser]
+        echanger = ~ry
+        gx[echanger], gy[echanger] = gy[echanger], gx[echanger]
+        s >>= 1
+    return cles
+
+
+def _cle_source(donnees_entree):
+    """
+    Retourne la taille et la date de modification des fichiers du shapefile source.
+    """
+    base = os.path.splitext(donnees_entree)[0]
+    cle = {}
+    for extension in (".shp", ".shx", ".dbf"):
+        chemin = base + extension
+        if os.path.exists(chemin):
+            statistiques = os.stat(chemin)
+            cle[extension] = [statistiques.st_size, statistiques.st_mtime_ns]
+    return cle
+
+
+def chemin_description(chemin_copie):
+    """
+    Retourne le chemin du fichier de description associé à une copie ordonnée.
+    """
+    return os.path.splitext(chemin_copie)[0] + ".json"
+
+
+def _trier_par_lots(lecteur, taille_lot, dossier_temp):
+    """
+    Première passe du tri externe : trie chaque lot d'entités selon sa clé de Hilbert.
+
+    :return: Liste des séquences triées (tableaux en mémoire ou projetés depuis le disque).
+    """
+    n = len(lecteur)
+    sequences = []
+    for debut in range(0, n, taille_lot):
+        fin = min(n, debut + taille_lot)
+        boites = lecteur.boites(debut, fin)
+        centres_x = (boites[:, 0] + boites[:, 2]) / 2
+        centres_y = (boites[:, 1] + boites[:, 3]) / 2
+        # Les entités nulles (boîte NaN) sont rangées en fin de fichier
+        cles = cles_hilbert(np.nan_to_num(centres_x), np.nan_to_num(centres_y), lecteur.etendue)
+        cles[np.isnan(centres_x)] = np.iinfo(np.uint64).max
+
+        sequence = np.empty(fin - debut, dtype=_TYPE_CLE)
+        tri = np.argsort(cles, kind="stable")
+        sequence["cle"] = cles[tri]
+        sequence["indice"] = tri + debut
+
+        if n <= taille_lot:
+            return [sequence]
+        chemin = os.path.join(dossier_temp, f"sequence_{len(sequences):05d}.npy")
+        np.save(chemin, sequence)
+        sequences.append(np.load(chemin, mmap_mode="r"))
+        print(f"[{datetime.now()}] Lot trié : entités {debut} à {fin - 1}")
+    return sequences
+
+
+def _fusionner(sequences, taille_tampon):
+    """
+    Seconde passe du tri externe : fusion des séquences triées, par paquets vectorisés.
+
+    À chaque tour, un tampon est lu dans chaque séquence ; tout ce qui est inférieur ou
+    égal à la plus petite dernière clé des tampons non terminaux peut être émis sans
+    attendre les tampons suivants.
+
+    :return: Générateur des indices d'entités, dans l'ordre de Hilbert.
+    """
+    positions = [0] * len(sequences)
+    while True:
+        tampons = []
+        seuil = np.iinfo(np.uint64).max
+        for sequence, position in zip(sequences, positions):
+            tampon = sequence[position:position + taille_tampon]
+            tampons.append(tampon)
+            if len(tampon) and position + len(tampon) < len(sequence):
+                seuil = min(seuil, int(tampon["cle"][-1]))
+        if not any(len(t) for t in tampons):
+            return
+
+        retenus = []
+        for i, tampon in enumerate(tampons):
+            nb = int(np.searchsorted(tampon["cle"], np.uint64(seuil), side="right"))
+            retenus.append(tampon[:nb])
+            positions[i] += nb
+        paquet = np.concatenate(retenus)
+        yield paquet["indice"][np.argsort(paquet["cle"], kind="stable")]
+
+
+def _ecrire_copie(lecteur, paquets, chemin_copie):
+    """
+    Écrit le shapefile ordonné en recopiant les enregistrements bruts dans l'ordre reçu.
+    """
+    base_source = os.path.splitext(lecteur.chemin_shp)[0]
+    base_copie = os.path.splitext(chemin_copie)[0]
+
+    with open(lecteur.chemin_shp, "rb") as f:
+        entete = bytearray(f.read(100))
+
+    avec_dbf = os.path.exists(base_source + ".dbf")
+    f_shp = open(base_copie + ".shp", "wb")
+    f_shx = open(base_copie + ".shx", "wb")
+    f_dbf = open(base_copie + ".dbf", "wb") if avec_dbf else None
+    try:
+        f_shp.write(entete)
+        f_shx.write(entete)
+        if avec_dbf:
+            f_dbf.write(lecteur.entete_dbf())
+
+        ecrits = 0
+        position = 100
+        for indices in paquets:
+            octets, longueurs = lecteur.enregistrements_bruts(indices)
+            debuts = np.zeros(len(indices), dtype=np.int64)
+            np.cumsum(longueurs[:-1], out=debuts[1:])
+
+            # Renumérotation des enregistrements (numéro grand-boutiste en tête)
+            numeros = np.arange(ecrits + 1, ecrits + len(indices) + 1).astype(">i4").view(np.uint8)
+            octets[debuts[:, None] + np.arange(4)] = numeros.reshape(-1, 4)
+            f_shp.write(octets.tobytes())
+
+            index = np.column_stack([(position + debuts) // 2, (longueurs - 8) // 2]).astype(">i4")
+            f_shx.write(index.tobytes())
+            if avec_dbf:
+                f_dbf.write(lecteur.lignes_dbf_brutes(indices).tobytes())
+
+            ecrits += len(indices)
+            position += int(longueurs.sum())
+
+        # Longueur des fichiers, en mots de 16 bits, dans leur en-tête
+        f_shp.seek(24)
+        f_shp.write(np.array([position // 2], dtype=">i4").tobytes())
+        f_shx.seek(24)
+        f_shx.write(np.array([(100 + 8 * ecrits) // 2], dtype=">i4").tobytes())
+        if avec_dbf:
+            f_dbf.write(b"\x1a")
+    finally:
+        for f in (f_shp, f_shx, f_dbf):
+            if f is not None:
+                f.close()
+
+    for extension in (".prj", ".cpg"):
+        if os.path.exists(base_source + extension):
+            shutil.copyfile(base_source + extension, base_copie + extension)
+
+
+def _supprimer_anciennes_copies(dossier_sortie, nom_sans_extension, source, chemin_json):
+    """
+    Supprime les copies ordonnées d'une version antérieure de la même source, une fois qu'elles
+    ont assez vieilli pour ne plus être lues par une exécution en cours.
+    """
+    limite = time.time() - _DELAI_NETTOYAGE
+    motif = os.path.join(glob.escape(dossier_sortie), f"{glob.escape(nom_sans_extension)}_*_hilbert.json")
+    for autre_json in glob.glob(motif):
+        if os.path.normcase(autre_json) == os.path.normcase(chemin_json):
+            continue
+        try:
+            with open(autre_json, "r", encoding="utf-8") as f:
+                description = json.load(f)
+            if (
+                os.path.normcase(description.get("source", "")) != os.path.normcase(source)
+                or os.path.getmtime(autre_json) > limite
+            ):
+                continue
+            # La description d'abord : une copie sans description n'est plus réutilisée
+            os.remove(autre_json)
+            base = os.path.splitext(autre_json)[0]
+            for extension in _EXTENSIONS_COPIE + _EXTENSIONS_INDEX:
+                if os.path.exists(base + extension):
+                    os.remove(base + extension)
+        except (OSError, ValueError) as e:
+            print(f"[{datetime.now()}] Ancienne copie ordonnée non supprimée ({autre_json}) : {e}")
+
+
+def trier_hilbert(donnees_entree, dossier_sortie, taille_lot=1_000_000, taille_tampon=65_536):
+    """
+    Crée une copie de travail du shapefile d'entrée dont les entités sont rangées selon la clé
+    de Hilbert du centre de leur boîte englobante.
+
+    Le tri est externe : les entités sont triées par lots de `taille_lot`, écrits sur disque,
+    puis fusionnées ; seuls les lots en cours de fusion sont en mémoire. Les étapes suivantes
+    ne profitent que de l'ordre des entités (lectures et écritures plus contiguës).
+
+    Le nom de la copie (`<nom>_<empreinte>_hilbert.shp`) dépend du chemin absolu de la source
+    et de l'état de ses fichiers : deux sources de même nom, ou deux versions d'une même
+    source, n'écrivent jamais dans les mêmes fichiers, et une copie terminée n'est plus
+    modifiée. Elle est réutilisée tant que la source n'a pas changé.
+
+    :param donnees_entree: Chemin du shapefile d'entrée.
+    :param dossier_sortie: Dossier où écrire la copie ordonnée.
+    :return: Chemin de la copie ordonnée (ou l'entrée telle quelle si ce n'est pas un shapefile).
+    """
+    if not donnees_entree.lower().endswith(".shp"):
+        return donnees_entree
+
+    source = os.path.abspath(donnees_entree)
+    cle = _cle_source(donnees_entree)
+    empreinte = hashlib.blake2b(
+        (os.path.normcase(source) + json.dumps(cle, sort_keys=True)).encode("utf-8"), digest_size=4
+    ).hexdigest()
+    nom_sans_extension = os.path.splitext(os.path.basename(donnees_entree))[0]
+    chemin_copie = os.path.join(dossier_sortie, f"{nom_sans_extension}_{empreinte}_hilbert.shp")
+    chemin_json = chemin_description(chemin_copie)
+
+    if os.path.exists(chemin_json) and os.path.exists(chemin_copie):
+        print(f"[{datetime.now()}] Copie ordonnée (Hilbert) réutilisée : {chemin_copie}")
+        return chemin_copie
+
+    print(f"[{datetime.now()}] Tri des entités selon la courbe de Hilbert : {donnees_entree}")
+    # La copie est écrite sous un nom propre à ce processus, puis mise en place par renommage.
+    # Deux exécutions simultanées sur la même source produisent des fichiers identiques.
+    base_copie = os.path.splitext(chemin_copie)[0]
+    base_temporaire = f"{base_copie}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    with LecteurShp(donnees_entree) as lecteur, tempfile.TemporaryDirectory(dir=dossier_sortie) as dossier_temp:
+        sequences = _trier_par_lots(lecteur, taille_lot, dossier_temp)
+        _ecrire_copie(lecteur, _fusionner(sequences, taille_tampon), f"{base_temporaire}.shp")
+        nb_entites = len(lecteur)
+        # Les séquences projetées doivent être libérées avant la suppression du dossier temporaire
+        del sequences
+
+    for extension in _EXTENSIONS_COPIE:
+        if os.path.exists(base_temporaire + extension):
+            os.replace(base_temporaire + extension, base_copie + extension)
+
+    # La description est écrite en dernier : sa présence atteste d'une copie complète
+    description = {
+        "source": source,
+        "cle_source": cle,
+        "nb_entites": nb_entites,
+    }
+    with open(f"{base_temporaire}.json", "w", encoding="utf-8") as f:
+        json.dump(description, f)
+    os.replace(f"{base_temporaire}.json", chemin_json)
+
+    print(f"[{datetime.now()}] Copie ordonnée écrite : {chemin_copie} ({nb_entites} entités)")
+    _supprimer_anciennes_copies(dossier_sortie, nom_sans_extension, source, chemin_json)
+    return chemin_copie
@@ -1,7 +1,10 @@
 import os
 import arcpy
 from fonction.ft_int_env import initialiser_env
+from fonction.ft_tri_hilbert import trier_hilbert
+from fonction.ft_accrochage import accrocher_couverture, rapporter_accrochage
 from fonction.ft_etapes import (
+    ajouter_oid_orig,
     generer_boite_englobante,
     supprimer_zones_recouvertes,
     convertir_en_polygones_simple,
@@ -44,12 +47,14 @@ def main():
     #Supperssions des polygones auto-recouvert
     # donnee_entre_v2 = supprimer_donnees_s_id(polygone_avec)
 
-    if "OID_ORIG" not in [f.name for f in arcpy.ListFields(donnees_entree)]:
-        arcpy.management.AddField(donnees_entree, "OID_ORIG", "LONG")
-        with arcpy.da.UpdateCursor(donnees_entree, ["OID@", "OID_ORIG"]) as cur:
-            for row in cur:
-                row[1] = row[0]
-                cur.updateRow(row)
+    ajouter_oid_orig(donnees_entree)
+
+    # Copie de travail rangée selon la courbe de Hilbert, pour des lectures contiguës
+    donnees_entree = trier_hilbert(donnees_entree, dossier_sortie)
+
+    # Accrochage sur une grille de précision fixe : supprime les micro-lacunes avant leur extraction
+    # (rapport=True : les lacunes avant accrochage sont comptées pour le bilan de l'étape 3)
+    donnees_entree, nb_lacunes_avant = accrocher_couverture(donnees_entree, geodatabase_temporaire, rapport=True)
 
     # Étape 1 : Génération de la boîte englobante
     boite_englobante = generer_boite_englobante(donnees_entree, geodatabase_temporaire)
@@ -61,6 +66,7 @@ def main():
 
     # Étape 3 : Conversion en polygones simples
     polygones_simple = convertir_en_polygones_simple(boite_englobante_sans_donnees, geodatabase_temporaire)
+    rapporter_accrochage(nb_lacunes_avant, polygones_simple)
 
     # Étape 4 : Suppression du plus grand polygone
     supprimer_plus_grand_polygone(polygones_simple)
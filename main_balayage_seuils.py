@@ -0,0 +1,43 @@
+import os
+import arcpy
+from fonction.ft_int_env import initialiser_env
+from fonction.ft_tri_hilbert import trier_hilbert
+from fonction.ft_accrochage import accrocher_couverture
+from fonction.ft_etapes import ajouter_oid_orig
+from fonction.ft_balayage_seuils import balayer_seuils
+
+def main():
+    """
+    Programme principal comparant plusieurs seuils de superficie des lacunes à combler.
+    Les étapes indépendantes du seuil ne sont exécutées qu'une fois.
+    """
+    # Étape 0 : Initialisation
+    dossier_racine, dossier_sortie, geodatabase_temporaire = initialiser_env()
+
+    # Étape 0 : Obtenir les données d'entrée
+    donnees_entree = input("Entrez le chemin des données d'entrée (Shapefile) : ")
+    if not arcpy.Exists(donnees_entree):
+        raise FileNotFoundError(f"Le fichier '{donnees_entree}' est introuvable.")
+
+    # Seuils à comparer, en km² (ex : 0.1 0.5 1 2)
+    saisie = input("Entrez les seuils de superficie à comparer en km² (séparés par des espaces) : ")
+    seuils = [float(s.replace(",", ".")) for s in saisie.split()]
+
+    nom_sans_extension = os.path.splitext(os.path.basename(donnees_entree))[0]
+    print(f"Nom du fichier sans extension : {nom_sans_extension}")
+
+    ajouter_oid_orig(donnees_entree)
+
+    # Copie de travail rangée selon la courbe de Hilbert, pour des lectures contiguës
+    donnees_entree = trier_hilbert(donnees_entree, dossier_sortie)
+
+    # Accrochage sur une grille de précision fixe : supprime les micro-lacunes avant leur extraction
+    # (rapport=True : les lacunes avant accrochage sont comptées pour le bilan de l'étape 3)
+    donnees_entree, nb_lacunes_avant = accrocher_couverture(donnees_entree, geodatabase_temporaire, rapport=True)
+
+    # Un résultat par seuil et un tableau comparatif dans le dossier de sortie
+    balayer_seuils(donnees_entree, geodatabase_temporaire, dossier_sortie, nom_sans_extension, seuils,
+                   nb_lacunes_avant=nb_lacunes_avant)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import arcpy
 import os
 
 from fonction.ft_int_env import initialiser_env
+from fonction.ft_index_spatial import preparer_index_spatial
 from fonction.ft_gesion_ar_mozaique import gestion_moz
 
 def main():
@@ -17,7 +18,7 @@ def main():
     6. Appeler la fonction de gestion de la mosaïque.
     """
     # Étape 0 : Initialisation de l'environnement
-    geodatabase_temporaire = initialiser_env()
+    _, _, geodatabase_temporaire = initialiser_env()
 
     # Étape 1 : Obtenir les données d'entrée
     donnees_entree = input("Entrez le chemin des données d'entrée (Shapefile) : ")
@@ -38,6 +39,9 @@ def main():
     dossier_sortie = os.path.dirname(donnees_entree)
     print(f"Dossier de sortie : {dossier_sortie}")
 
+    # Index spatial ArcGIS du shapefile d'entrée, s'il peut être écrit à côté de celui-ci
+    preparer_index_spatial(donnees_entree)
+
     # Étape 5 : Gestion des données avec mosaïque
     gestion_moz(geodatabase_temporaire, donnees_entree, nom_fichier, dossier_sortie)
 
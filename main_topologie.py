@@ -0,0 +1,42 @@
+import os
+import arcpy
+from fonction.ft_int_env import initialiser_env
+from fonction.ft_tri_hilbert import trier_hilbert
+from fonction.ft_topologie import construire_topologie, exporter_topologie
+from fonction.ft_etapes import ajouter_oid_orig, exporter_resultat
+
+def main():
+    """
+    Programme principal comblant les lacunes et résolvant les recouvrements par réaffectation
+    des faces d'une topologie à arêtes partagées, sans superposition de polygones.
+    """
+    # Étape 0 : Initialisation
+    dossier_racine, dossier_sortie, geodatabase_temporaire = initialiser_env()
+
+    # Étape 0 : Obtenir les données d'entrée
+    donnees_entree = input("Entrez le chemin des données d'entrée (Shapefile) : ")
+    if not arcpy.Exists(donnees_entree):
+        raise FileNotFoundError(f"Le fichier '{donnees_entree}' est introuvable.")
+
+    nom_sans_extension = os.path.splitext(os.path.basename(donnees_entree))[0]
+    print(f"Nom du fichier sans extension : {nom_sans_extension}")
+
+    ajouter_oid_orig(donnees_entree)
+
+    # Copie de travail rangée selon la courbe de Hilbert, pour des lectures contiguës
+    donnees_entree = trier_hilbert(donnees_entree, dossier_sortie)
+
+    # Étape 1 : Construction de la topologie (arêtes partagées, faces et propriétaires)
+    topologie = construire_topologie(donnees_entree)
+
+    # Étape 2 : Lacunes de moins de 0.5 km² et recouvrements réaffectés à une seule entité
+    topologie.reaffecter_faces(seuil_superficie=0.5)
+
+    # Étape 3 : Dissolution par entité et jointure des attributs
+    resultat_topologie = exporter_topologie(topologie, donnees_entree, geodatabase_temporaire, nom_sans_extension)
+
+    # Étape 4 : Export des données
+    exporter_resultat(resultat_topologie, dossier_sortie)
+
+if __name__ == "__main__":
+    main()
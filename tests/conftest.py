@@ -0,0 +1,59 @@
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _ecrire_shapefile(base, polygones, identifiants, wkt=None):
+    """
+    Écrit un shapefile de polygones (liste d'anneaux (n, 2) par entité) avec un champ OID_ORIG.
+    """
+    enregistrements = []
+    for anneaux in polygones:
+        points = np.vstack(anneaux)
+        parties = np.cumsum([0] + [len(anneau) for anneau in anneaux[:-1]])
+        enregistrements.append(
+            struct.pack("<i4d2i", 5, *points.min(0), *points.max(0), len(anneaux), len(points))
+            + struct.pack(f"<{len(anneaux)}i", *parties)
+            + points.astype("<f8").tobytes()
+        )
+    tous = np.vstack([np.vstack(anneaux) for anneaux in polygones])
+
+    def entete(longueur):
+        return (struct.pack(">7i", 9994, 0, 0, 0, 0, 0, longueur // 2) + struct.pack("<2i", 1000, 5)
+                + struct.pack("<4d", *tous.min(0), *tous.max(0)) + struct.pack("<4d", 0, 0, 0, 0))
+
+    corps, index, position = b"", b"", 100
+    for numero, contenu in enumerate(enregistrements, start=1):
+        index += struct.pack(">2i", position // 2, len(contenu) // 2)
+        corps += struct.pack(">2i", numero, len(contenu) // 2) + contenu
+        position += 8 + len(contenu)
+    with open(base + ".shp", "wb") as f:
+        f.write(entete(100 + len(corps)) + corps)
+    with open(base + ".shx", "wb") as f:
+        f.write(entete(100 + len(index)) + index)
+
+    dbf = struct.pack("<B3BIHH20x", 3, 124, 1, 1, len(polygones), 65, 11)
+    dbf += struct.pack("<11sc4xBB14x", b"OID_ORIG", b"N", 10, 0) + b"\r"
+    dbf += b"".join(b" " + str(i).encode("ascii").rjust(10) for i in identifiants) + b"\x1a"
+    with open(base + ".dbf", "wb") as f:
+        f.write(dbf)
+    if wkt:
+        with open(base + ".prj", "w", encoding="ascii") as f:
+            f.write(wkt)
+    return base + ".shp"
+
+
+@pytest.fixture
+def ecrire_shapefile(tmp_path):
+    """
+    Écrit un shapefile de polygones dans le dossier temporaire du test et retourne son chemin.
+    """
+    def ecrire(polygones, identifiants=None, wkt=None, nom="couche"):
+        identifiants = range(len(polygones)) if identifiants is None else identifiants
+        return _ecrire_shapefile(str(tmp_path / nom), polygones, identifiants, wkt)
+    return ecrire
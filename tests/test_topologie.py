@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from fonction.ft_topologie import construire_topologie
+
+WKT_WGS84 = (
+    'GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+    'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]'
+)
+
+
+def rectangle(xmin, ymin, xmax, ymax):
+    """Anneau extérieur (sens horaire) d'un rectangle."""
+    return np.array([[xmin, ymin], [xmin, ymax], [xmax, ymax], [xmax, ymin], [xmin, ymin]], dtype=float)
+
+
+def trou(xmin, ymin, xmax, ymax):
+    """Anneau intérieur (sens trigonométrique) d'un rectangle."""
+    return rectangle(xmin, ymin, xmax, ymax)[::-1]
+
+
+def superficie(anneaux):
+    """Superficie d'un polygone au format ESRI (extérieurs horaires, trous trigonométriques)."""
+    return -sum(0.5 * np.sum(a[:-1, 0] * a[1:, 1] - a[1:, 0] * a[:-1, 1]) for a in anneaux)
+
+
+def superficies_par_id(topologie):
+    return {int(topologie.ids[e]): superficie(anneaux) for e, anneaux in topologie.polygones().items()}
+
+
+def test_lacune_comblee_par_la_plus_longue_limite(ecrire_shapefile):
+    # Lacune de 1 m x 10 m entre A (limite de 10 m) et B, E (limites de 5 m chacune)
+    chemin = ecrire_shapefile([
+        [rectangle(0, 0, 10, 10)],
+        [rectangle(11, 0, 21, 5)],
+        [rectangle(11, 5, 21, 10)],
+        [rectangle(0, 10, 21, 20)],
+        [rectangle(0, -10, 21, 0)],
+    ], identifiants=[1, 2, 3, 4, 5])
+    topologie = construire_topologie(chemin, precision=1e-4)
+
+    lacunes = topologie.lacunes()
+    assert len(lacunes) == 1
+    assert topologie.superficies_km2[lacunes[0]] == pytest.approx(10e-6)
+    assert len(topologie.recouvrements()) == 0
+
+    statistiques = topologie.reaffecter_faces(seuil_superficie=0.5)
+    assert statistiques["lacunes_comblees"] == 1
+    assert superficies_par_id(topologie)[1] == pytest.approx(110)
+
+
+def test_recouvrement_attribue_au_plus_petit_identifiant(ecrire_shapefile):
+    chemin = ecrire_shapefile([[rectangle(0, 0, 10, 10)], [rectangle(5, 0, 15, 10)]], identifiants=[7, 3])
+    topologie = construire_topologie(chemin, precision=1e-4)
+
+    recouvrements = topologie.recouvrements()
+    assert len(recouvrements) == 1
+    assert topologie.superficies_km2[recouvrements[0]] == pytest.approx(50e-6)
+    assert len(topologie.lacunes()) == 0
+
+    statistiques = topologie.reaffecter_faces()
+    assert statistiques["recouvrements_resolus"] == 1
+    assert superficies_par_id(topologie) == {7: pytest.approx(50), 3: pytest.approx(100)}
+
+
+def test_trou_contenant_un_ilot(ecrire_shapefile):
+    # E a un trou de 10 m x 10 m, qui contient l'îlot F de 6 m x 6 m
+    chemin = ecrire_shapefile([
+        [rectangle(0, 0, 30, 30), trou(10, 10, 20, 20)],
+        [rectangle(12, 12, 18, 18)],
+    ], identifiants=[100, 101])
+    topologie = construire_topologie(chemin, precision=1e-4)
+
+    lacunes = topologie.lacunes()
+    assert len(lacunes) == 1
+    # L'îlot est déduit de la superficie de la lacune qui le contient
+    assert topologie.superficies_km2[lacunes[0]] == pytest.approx(64e-6)
+    assert sorted(len(topologie.proprietaires[f]) for f in topologie._faces_reelles()) == [0, 1, 1]
+
+    # Lacune plus grande que le seuil : E garde son trou
+    topologie.reaffecter_faces(seuil_superficie=1e-5)
+    assert superficies_par_id(topologie) == {100: pytest.approx(800), 101: pytest.approx(36)}
+
+    # Lacune comblée par E (limite de 40 m contre 24 m avec F), qui entoure désormais F
+    topologie.reaffecter_faces(seuil_superficie=0.5)
+    assert superficies_par_id(topologie) == {100: pytest.approx(864), 101: pytest.approx(36)}
+
+
+def test_longue_diagonale(ecrire_shapefile):
+    # Triangle à diagonale de 28 km, bordé de 2 000 carrés de 10 m le long d'un côté
+    polygones = [[np.array([[0, 0], [0, 20000], [20000, 0], [0, 0]], dtype=float)]]
+    polygones += [[rectangle(10 * k, -10, 10 * k + 10, 0)] for k in range(2000)]
+    chemin = ecrire_shapefile(polygones)
+    topologie = construire_topologie(chemin, precision=1e-4)
+
+    assert len(topologie.lacunes()) == 0
+    assert len(topologie.recouvrements()) == 0
+    topologie.reaffecter_faces()
+    superficies = superficies_par_id(topologie)
+    assert superficies[0] == pytest.approx(2e8)
+    assert len(superficies) == 2001
+
+
+def test_superficie_ellipsoidale(ecrire_shapefile):
+    # Case de 1° x 1° à l'équateur sur l'ellipsoïde WGS 84
+    chemin = ecrire_shapefile([[rectangle(0, 0, 1, 1)]], wkt=WKT_WGS84)
+    topologie = construire_topologie(chemin)
+    face = topologie._faces_reelles()[0]
+    assert topologie.superficies_km2[face] == pytest.approx(12308.4639, rel=1e-8)